@@ -0,0 +1,142 @@
+# artifacts.py - Versioned RNN artifact: config.json, vocab.txt string table, safetensors weights
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import struct
+import warnings
+import numpy as np
+import torch
+
+ARTIFACT_VERSION = 1
+
+# safetensors dtype tags; the file layout is an 8-byte little-endian header length, a JSON header
+# with dtype/shape/data_offsets per tensor, then the raw tensor bytes.
+DTYPES = {
+    'F64': (torch.float64, np.float64),
+    'F32': (torch.float32, np.float32),
+    'F16': (torch.float16, np.float16),
+    'I64': (torch.int64, np.int64),
+    'I32': (torch.int32, np.int32),
+    'I16': (torch.int16, np.int16),
+    'I8': (torch.int8, np.int8),
+    'U8': (torch.uint8, np.uint8),
+    'BOOL': (torch.bool, np.bool_)
+}
+TORCH_TO_TAG = {torch_dtype: tag for tag, (torch_dtype, _) in DTYPES.items()}
+
+def directory_fingerprint(path):
+    # Cheap artifact version: changes whenever a file in the model directory is added, rewritten or removed.
+    digest = hashlib.sha256(os.path.abspath(path).encode('utf-8'))
+    for name in sorted(os.listdir(path)):
+        stat = os.stat(os.path.join(path, name))
+        digest.update(f'{name}:{stat.st_size}:{stat.st_mtime_ns}'.encode('utf-8'))
+    return digest.hexdigest()
+
+def save_safetensors(tensors, path, metadata=None):
+    header = {}
+    arrays = []
+    offset = 0
+    for name, tensor in tensors.items():
+        array = tensor.detach().cpu().contiguous().numpy()
+        header[name] = {
+            'dtype': TORCH_TO_TAG[tensor.dtype],
+            'shape': list(array.shape),
+            'data_offsets': [offset, offset + array.nbytes]
+        }
+        arrays.append(array)
+        offset += array.nbytes
+    if metadata:
+        header['__metadata__'] = {key: str(value) for key, value in metadata.items()}
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    header_bytes += b' ' * (-len(header_bytes) % 8)
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for array in arrays:
+            f.write(array.tobytes())
+
+def load_safetensors(path):
+    with open(path, 'rb') as f:
+        header_size = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    header.pop('__metadata__', None)
+
+    # Copy-on-write mapping: tensors share pages with the file until something writes to them.
+    data = np.memmap(path, dtype=np.uint8, mode='c', offset=8 + header_size)
+    tensors = {}
+    for name, info in header.items():
+        start, end = info['data_offsets']
+        _, np_dtype = DTYPES[info['dtype']]
+        tensors[name] = torch.from_numpy(data[start:end].view(np_dtype).reshape(info['shape']))
+    return tensors
+
+def save_rnn_artifact(save_dir, config, vocab, state_dict):
+    os.makedirs(save_dir, exist_ok=True)
+    save_safetensors(state_dict, f'{save_dir}/model.safetensors', {'format_version': ARTIFACT_VERSION})
+    # Words come from str.split(), so they never contain a newline: line i is token id i.
+    with open(f'{save_dir}/vocab.txt', 'w', encoding='utf-8') as f:
+        f.write('\n'.join(vocab))
+    with open(f'{save_dir}/config.json', 'w') as f:
+        json.dump({'format_version': ARTIFACT_VERSION, 'model': config}, f, indent=2)
+
+def is_rnn_artifact(model_path):
+    return os.path.exists(f'{model_path}/config.json')
+
+def load_rnn_artifact(model_path):
+    with open(f'{model_path}/config.json') as f:
+        artifact = json.load(f)
+    if artifact['format_version'] > ARTIFACT_VERSION:
+        raise ValueError(f"{model_path} uses artifact format {artifact['format_version']}, "
+                         f"this code reads up to {ARTIFACT_VERSION}")
+    with open(f'{model_path}/vocab.txt', encoding='utf-8') as f:
+        vocab = f.read().split('\n')
+    return artifact['model'], vocab, load_safetensors(f'{model_path}/model.safetensors')
+
+def load_legacy_rnn_artifact(model_path):
+    with open(f'{model_path}/config.pkl', 'rb') as f:
+        config = pickle.load(f)
+    with open(f'{model_path}/vocab.pkl', 'rb') as f:
+        vocab_data = pickle.load(f)
+    return config, vocab_data['vocab'], torch.load(f'{model_path}/model.pth')
+
+def save_legacy_rnn_artifact(save_dir, config, vocab, state_dict):
+    # The pre-artifact layout, kept only so old deployments and the load benchmark can be reproduced.
+    os.makedirs(save_dir, exist_ok=True)
+    torch.save(state_dict, f'{save_dir}/model.pth')
+    with open(f'{save_dir}/vocab.pkl', 'wb') as f:
+        pickle.dump({'vocab': vocab, 'word_to_idx': {word: idx for idx, word in enumerate(vocab)}}, f)
+    with open(f'{save_dir}/config.pkl', 'wb') as f:
+        pickle.dump(config, f)
+
+def load_rnn_files(model_path, allow_legacy=False):
+    # The pickled layout executes code on load, so it is only read when the caller asks for it.
+    if is_rnn_artifact(model_path):
+        return load_rnn_artifact(model_path)
+    if not allow_legacy:
+        raise FileNotFoundError(f"{model_path} has no config.json; convert it with `python artifacts.py {model_path}` "
+                                f"or pass allow_legacy=True to unpickle the legacy files")
+    warnings.warn(f"unpickling legacy RNN files from {model_path}; convert them with `python artifacts.py {model_path}`")
+    return load_legacy_rnn_artifact(model_path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a pickled rnn-model directory to the versioned artifact format')
+    parser.add_argument('model_path', nargs='?', default='./rnn-model')
+    parser.add_argument('--output', help='destination directory (default: alongside the source files)')
+    parser.add_argument('--to-legacy', action='store_true',
+                        help='convert the other way: write model.pth, config.pkl and vocab.pkl from an artifact')
+    args = parser.parse_args()
+
+    output = args.output or args.model_path
+    if args.to_legacy:
+        save_legacy_rnn_artifact(output, *load_rnn_artifact(args.model_path))
+        print(f"Wrote model.pth, config.pkl and vocab.pkl to '{output}'")
+        return
+    config, vocab, state_dict = load_legacy_rnn_artifact(args.model_path)
+    save_rnn_artifact(output, config, vocab, state_dict)
+    print(f"Wrote config.json, vocab.txt and model.safetensors to '{output}'")
+
+if __name__ == "__main__":
+    main()
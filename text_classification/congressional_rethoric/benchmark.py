@@ -0,0 +1,566 @@
+# benchmark.py - Performance benchmarks for the Congressional rhetoric classifiers
+import argparse
+import json
+import platform
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from data import create_congressional_rhetoric_dataset
+from encoding import encode_texts
+from micro_batching import MicroBatcher
+
+def sample_texts(n, seed=42):
+    texts = create_congressional_rhetoric_dataset()['text'].values
+    rng = np.random.default_rng(seed)
+    return [str(texts[i]) for i in rng.integers(0, len(texts), size=n)]
+
+def synthetic_corpus(n, max_speeches=4, seed=42):
+    # Joins 1..max_speeches speeches per example so lengths vary like real floor statements.
+    df = create_congressional_rhetoric_dataset()
+    texts, labels = df['text'].values, df['label'].values
+    rng = np.random.default_rng(seed)
+    corpus_texts, corpus_labels = [], []
+    for _ in range(n):
+        picks = rng.integers(0, len(texts), size=rng.integers(1, max_speeches + 1))
+        corpus_texts.append(' '.join(str(texts[i]) for i in picks))
+        corpus_labels.append(int(labels[picks[0]]))
+    return corpus_texts, np.array(corpus_labels)
+
+def latency_summary(latencies):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'mean_ms': float(latencies.mean())
+    }
+
+def run_load(request_fn, texts, concurrency):
+    def timed_request(text):
+        start = time.perf_counter()
+        request_fn(text)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed_request, texts))
+    elapsed = time.perf_counter() - start
+
+    result = {'throughput': len(texts) / elapsed}
+    result.update(latency_summary(latencies))
+    return result
+
+def benchmark_micro_batching(models=('rnn',), n_requests=2000, concurrency=32, max_batch_size=32, max_latency_ms=5.0):
+    from inference import CongressionalClassifier
+
+    texts = sample_texts(n_requests)
+    classifier = CongressionalClassifier(models=models, batch_size=max_batch_size)
+    classifier.predict_batch(texts[:max_batch_size])
+
+    direct = run_load(classifier.predict, texts, concurrency)
+    with MicroBatcher(classifier.predict_batch, max_batch_size, max_latency_ms) as batcher:
+        batched = run_load(batcher.predict, texts, concurrency)
+        batched.update(batcher.stats())
+
+    for name, result in (('batch-of-1', direct), ('micro-batched', batched)):
+        print(f"{name:>14}: {result['throughput']:8.1f} req/s, "
+              f"p50 {result['p50_ms']:7.2f} ms, p99 {result['p99_ms']:7.2f} ms")
+    print(f"Throughput gain: {batched['throughput'] / direct['throughput']:.2f}x, "
+          f"mean batch size {batched['mean_batch_size']:.1f}")
+    return {'direct': direct, 'micro_batched': batched}
+
+def legacy_texts_to_sequences(texts, word_to_idx, max_length=256):
+    sequences = []
+    for text in texts:
+        seq = [word_to_idx.get(word, 1) for word in text.lower().split()]
+        if len(seq) > max_length:
+            seq = seq[:max_length]
+        else:
+            seq.extend([0] * (max_length - len(seq)))
+        sequences.append(seq)
+    return np.array(sequences)
+
+def benchmark_encoding(n_texts=1_000_000, max_length=256):
+    from train_rnn import build_vocabulary
+
+    texts = sample_texts(n_texts)
+    _, word_to_idx = build_vocabulary(texts[:10000])
+
+    start = time.perf_counter()
+    legacy = legacy_texts_to_sequences(texts, word_to_idx, max_length)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded = encode_texts(texts, word_to_idx, max_length)
+    encoded_seconds = time.perf_counter() - start
+
+    assert np.array_equal(legacy, encoded), 'encode_texts output differs from the legacy loop'
+    print(f"legacy loop:  {legacy_seconds:7.2f} s ({n_texts / legacy_seconds:10.0f} texts/s)")
+    print(f"encode_texts: {encoded_seconds:7.2f} s ({n_texts / encoded_seconds:10.0f} texts/s)")
+    print(f"Speedup: {legacy_seconds / encoded_seconds:.2f}x")
+    return {'legacy_seconds': legacy_seconds, 'encode_texts_seconds': encoded_seconds}
+
+def legacy_build_vocabulary(texts, max_vocab=10000):
+    from collections import Counter
+
+    words = []
+    for text in texts:
+        words.extend(text.lower().split())
+    vocab = ['<PAD>', '<UNK>'] + [word for word, _ in Counter(words).most_common(max_vocab-2)]
+    return vocab, {word: idx for idx, word in enumerate(vocab)}
+
+def benchmark_vocabulary(n_texts=200000, num_workers=None):
+    import os
+    from train_rnn import build_vocabulary
+
+    texts, _ = synthetic_corpus(n_texts)
+    num_workers = num_workers or os.cpu_count()
+
+    start = time.perf_counter()
+    legacy_vocab, _ = legacy_build_vocabulary(texts)
+    legacy_seconds = time.perf_counter() - start
+
+    results = {'legacy_seconds': legacy_seconds}
+    for workers in sorted({1, num_workers}):
+        start = time.perf_counter()
+        vocab, _ = build_vocabulary(texts, num_workers=workers)
+        results[f'workers_{workers}_seconds'] = time.perf_counter() - start
+        assert vocab == legacy_vocab, 'build_vocabulary ranking differs from the legacy Counter pass'
+
+    print(f"legacy Counter pass:      {legacy_seconds:7.2f} s")
+    for workers in sorted({1, num_workers}):
+        seconds = results[f'workers_{workers}_seconds']
+        print(f"build_vocabulary, {workers:>2} proc: {seconds:7.2f} s ({legacy_seconds / seconds:.2f}x)")
+    return results
+
+def _measure_rnn_load(model_path):
+    import resource
+    from inference import load_rnn
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    load_rnn(model_path, allow_legacy=True)
+    seconds = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return seconds, (rss_after - rss_before) / 1024
+
+def benchmark_artifact_load(model_path='./rnn-model'):
+    import multiprocessing
+    import os
+    import tempfile
+    from artifacts import load_rnn_files, save_legacy_rnn_artifact, save_rnn_artifact
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Both layouts are written from the same weights into separate directories, so the pickle run
+        # cannot pick up a config.json next to it.
+        pickle_path, artifact_path = os.path.join(tmp_dir, 'pickle'), os.path.join(tmp_dir, 'artifact')
+        files = load_rnn_files(model_path, allow_legacy=True)
+        save_legacy_rnn_artifact(pickle_path, *files)
+        save_rnn_artifact(artifact_path, *files)
+        # Fresh interpreters so neither load benefits from the other's imports or page cache state in-process.
+        context = multiprocessing.get_context('spawn')
+        for name, path in (('pickle', pickle_path), ('artifact', artifact_path)):
+            with context.Pool(1) as pool:
+                seconds, rss_mb = pool.apply(_measure_rnn_load, (path,))
+            results[name] = {'load_ms': 1000 * seconds, 'peak_rss_delta_mb': rss_mb}
+            print(f"{name:>8}: load {1000 * seconds:7.2f} ms, peak RSS +{rss_mb:6.1f} MB")
+    return results
+
+def time_calls(fn, repeats):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+def benchmark_packed_forward(vocab_size=10000, batch_sizes=(1, 32), min_words=20, max_words=60, max_length=256, repeats=20):
+    import torch
+    from models import CongressionalRNN
+
+    torch.manual_seed(42)
+    padded_model = CongressionalRNN(vocab_size).eval()
+    packed_model = CongressionalRNN(vocab_size, pack_sequences=True).eval()
+    packed_model.load_state_dict(padded_model.state_dict())
+
+    results = {}
+    for batch_size in batch_sizes:
+        lengths = torch.randint(min_words, max_words + 1, (batch_size,))
+        sequences = torch.zeros(batch_size, max_length, dtype=torch.long)
+        for i, length in enumerate(lengths.tolist()):
+            sequences[i, :length] = torch.randint(2, vocab_size, (length,))
+
+        with torch.no_grad():
+            # The packed final state must equal the full-length run read at each text's last real token.
+            embedded = padded_model.embedding(sequences)
+            lstm2_out, _ = padded_model.lstm2(padded_model.lstm1(embedded)[0])
+            expected = lstm2_out[torch.arange(batch_size), lengths - 1]
+            assert torch.allclose(packed_model.packed_last_hidden(sequences, lengths), expected, atol=1e-5)
+
+            padded_seconds = time_calls(lambda: padded_model(sequences), repeats)
+            packed_seconds = time_calls(lambda: packed_model(sequences, lengths), repeats)
+
+        results[batch_size] = {'padded_ms': 1000 * padded_seconds, 'packed_ms': 1000 * packed_seconds}
+        print(f"batch {batch_size:>4}: padded {1000 * padded_seconds:8.2f} ms, packed {1000 * packed_seconds:8.2f} ms, "
+              f"speedup {padded_seconds / packed_seconds:.2f}x")
+    return results
+
+def train_one_epoch(model, loader, lr=0.001):
+    import torch
+    import torch.nn as nn
+
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    model.train()
+    start = time.perf_counter()
+    for sequences, labels in loader:
+        optimizer.zero_grad()
+        loss = criterion(model(sequences), labels)
+        loss.backward()
+        optimizer.step()
+    return time.perf_counter() - start
+
+def benchmark_rnn_epoch(n_texts=20000, batch_size=32):
+    import torch
+    from torch.utils.data import DataLoader
+    from models import CongressionalRNN
+    from train_rnn import BucketBatchSampler, CongressionalRNNDataset, build_vocabulary, pad_collate, texts_to_sequences
+
+    texts, labels = synthetic_corpus(n_texts)
+    vocab, word_to_idx = build_vocabulary(texts)
+    dataset = CongressionalRNNDataset(texts_to_sequences(texts, word_to_idx), labels)
+
+    setups = {
+        'padded model, fixed 256 padding': (False, DataLoader(dataset, batch_size=batch_size, shuffle=True)),
+        'packed model, fixed 256 padding': (True, DataLoader(dataset, batch_size=batch_size, shuffle=True)),
+        'packed model, bucketed + dynamic padding': (True, DataLoader(
+            dataset, batch_sampler=BucketBatchSampler(dataset.lengths, batch_size), collate_fn=pad_collate
+        ))
+    }
+    results = {}
+    for name, (pack_sequences, loader) in setups.items():
+        torch.manual_seed(42)
+        model = CongressionalRNN(len(vocab), pack_sequences=pack_sequences)
+        results[name] = train_one_epoch(model, loader)
+        print(f"{name:>42}: {results[name]:7.2f} s/epoch")
+    return results
+
+def _ddp_epoch_worker(rank, world_size, port, vocab_size, sequences, labels, batch_size, results):
+    import os
+    import torch
+    import torch.distributed as dist
+    from torch.nn.parallel import DistributedDataParallel
+    from torch.utils.data import DataLoader
+    from models import CongressionalRNN
+    from train_rnn import BucketBatchSampler, CongressionalRNNDataset, pad_collate
+
+    os.environ.update({'MASTER_ADDR': '127.0.0.1', 'MASTER_PORT': str(port)})
+    dist.init_process_group('gloo', rank=rank, world_size=world_size)
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // world_size))
+    torch.manual_seed(42)
+
+    dataset = CongressionalRNNDataset(sequences, labels)
+    loader = DataLoader(dataset, collate_fn=pad_collate, batch_sampler=BucketBatchSampler(
+        dataset.lengths, batch_size, num_replicas=world_size, rank=rank
+    ))
+    model = DistributedDataParallel(CongressionalRNN(vocab_size, pack_sequences=True))
+    criterion = torch.nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+
+    dist.barrier()
+    start = time.perf_counter()
+    with model.join():
+        for batch_sequences, batch_labels in loader:
+            optimizer.zero_grad()
+            criterion(model(batch_sequences), batch_labels).backward()
+            optimizer.step()
+    dist.barrier()
+    if rank == 0:
+        results.put(time.perf_counter() - start)
+    dist.destroy_process_group()
+
+def benchmark_ddp_scaling(n_texts=20000, batch_size=32, max_processes=None, port=29512):
+    import os
+    import torch.multiprocessing as mp
+    from train_rnn import build_vocabulary, texts_to_sequences
+
+    texts, labels = synthetic_corpus(n_texts)
+    vocab, word_to_idx = build_vocabulary(texts)
+    sequences = texts_to_sequences(texts, word_to_idx)
+    max_processes = max_processes or os.cpu_count() or 1
+    process_counts = sorted({2 ** i for i in range(max_processes.bit_length())} | {max_processes})
+
+    # Fixed global work (strong scaling): N processes split one epoch; efficiency = speedup / N.
+    context = mp.get_context('spawn')
+    results = {}
+    for world_size in process_counts:
+        queue = context.SimpleQueue()
+        mp.spawn(_ddp_epoch_worker, nprocs=world_size,
+                 args=(world_size, port, len(vocab), sequences, labels, batch_size, queue))
+        seconds = queue.get()
+        speedup = results[1]['epoch_seconds'] / seconds if results else 1.0
+        results[world_size] = {'epoch_seconds': seconds, 'speedup': speedup, 'efficiency': speedup / world_size}
+        print(f"{world_size:>3} proc: {seconds:7.2f} s/epoch, speedup {speedup:5.2f}x, "
+              f"efficiency {speedup / world_size:6.1%}")
+    return results
+
+def benchmark_exported_runtimes(rnn_path='./rnn-model', distilbert_path='./destilbert-model',
+                                batch_sizes=(1, 32), repeats=20):
+    import os
+    import tempfile
+    from functools import partial
+    from export import (RUNTIMES, distilbert_graph_logits, export_distilbert, export_rnn, load_runtime,
+                        rnn_graph_logits)
+    from inference import distilbert_logits, load_distilbert, load_rnn, rnn_logits
+
+    texts = sample_texts(max(batch_sizes))
+    setups = []
+    if os.path.exists(rnn_path):
+        model, word_to_idx = load_rnn(rnn_path)
+        setups.append(('RNN', partial(rnn_logits, model, word_to_idx),
+                       lambda out, runtime: export_rnn(model, rnn_path, runtime, out),
+                       lambda graph: partial(rnn_graph_logits, graph, word_to_idx, model.pack_sequences)))
+    if os.path.exists(distilbert_path):
+        bert, tokenizer = load_distilbert(distilbert_path)
+        setups.append(('DistilBERT', partial(distilbert_logits, bert, tokenizer),
+                       lambda out, runtime: export_distilbert(bert, tokenizer, distilbert_path, runtime, out),
+                       lambda graph: partial(distilbert_graph_logits, graph, tokenizer)))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as export_dir:
+        for name, eager_fn, export_fn, graph_fn in setups:
+            batch_fns = {'eager': eager_fn}
+            for runtime in sorted(RUNTIMES):
+                try:
+                    export_fn(export_dir, runtime)
+                    batch_fns[runtime] = graph_fn(load_runtime(export_dir, runtime))
+                except ImportError as error:
+                    print(f"{name}/{runtime}: skipped ({error})")
+
+            for runtime, batch_fn in batch_fns.items():
+                for batch_size in batch_sizes:
+                    batch = texts[:batch_size]
+                    seconds = time_calls(lambda: batch_fn(batch), repeats)
+                    results[f'{name}/{runtime}/batch_{batch_size}'] = {
+                        'latency_ms': 1000 * seconds, 'throughput': batch_size / seconds
+                    }
+                    print(f"{name:>10} {runtime:>11} batch {batch_size:>3}: {1000 * seconds:8.2f} ms, "
+                          f"{batch_size / seconds:8.1f} texts/sec")
+    return results
+
+def benchmark_logits_head(target_accuracy=0.9, max_epochs=50, lr=0.1, batch_size=32, repeats=200):
+    import torch
+    import torch.nn as nn
+    from models import CongressionalRNN
+    from train_rnn import in_memory_loaders
+
+    class SoftmaxOutputRNN(nn.Module):
+        # The pre-change model: probabilities out of forward, then CrossEntropyLoss on top of them.
+        def __init__(self, model):
+            super(SoftmaxOutputRNN, self).__init__()
+            self.model = model
+
+        def forward(self, x):
+            return torch.softmax(self.model(x), dim=1)
+
+    def accuracy(model, loader):
+        model.eval()
+        correct = total = 0
+        with torch.no_grad():
+            for sequences, labels in loader:
+                correct += int((model(sequences).argmax(dim=1) == labels).sum())
+                total += len(labels)
+        return correct / total
+
+    vocab, _, train_loader, val_loader = in_memory_loaders(batch_size)
+    results = {}
+    for name, wrap in (('softmax in forward', SoftmaxOutputRNN), ('raw logits', lambda model: model)):
+        torch.manual_seed(42)
+        model = wrap(CongressionalRNN(len(vocab), pack_sequences=True))
+        criterion = nn.CrossEntropyLoss()
+        optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+        epochs_to_target, best = None, 0.0
+        for epoch in range(1, max_epochs + 1):
+            model.train()
+            for sequences, labels in train_loader:
+                optimizer.zero_grad()
+                criterion(model(sequences), labels).backward()
+                optimizer.step()
+            best = max(best, accuracy(model, val_loader))
+            if best >= target_accuracy:
+                epochs_to_target = epoch
+                break
+        results[name] = {'epochs_to_target': epochs_to_target, 'best_val_accuracy': best}
+        print(f"{name:>18}: {epochs_to_target or f'>{max_epochs}'} epochs to {target_accuracy:.2f} val acc "
+              f"(best {best:.4f})")
+
+    model = CongressionalRNN(len(vocab), pack_sequences=True).eval()
+    sequences, _ = next(iter(val_loader))
+
+    def double_softmax():
+        with torch.no_grad():
+            torch.softmax(torch.softmax(model(sequences), dim=1), dim=1).max(dim=1)
+
+    before = time_calls(double_softmax, repeats)
+    after = time_calls(lambda: model.classify(sequences), repeats)
+    results['inference_ms'] = {'softmax_twice': 1000 * before, 'fused_head': 1000 * after}
+    print(f"per-call inference: softmax twice {1000 * before:.3f} ms, fused head {1000 * after:.3f} ms")
+    return results
+
+def environment_info():
+    import os
+    import sys
+    import torch
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    info = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_commit': commit,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'numpy': np.__version__
+    }
+    try:
+        import transformers
+        info['transformers'] = transformers.__version__
+    except ImportError:
+        info['transformers'] = None
+    return info
+
+def time_repeats(fn, repeats, items=1, warmup=1, setup=None):
+    # setup() runs untimed before every call, e.g. to reinitialise a model being trained.
+    for _ in range(warmup):
+        fn(setup() if setup else None)
+    seconds = []
+    for _ in range(repeats):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        fn(state)
+        seconds.append(time.perf_counter() - start)
+    seconds = np.asarray(seconds)
+    return {
+        'repeats': repeats,
+        'items': items,
+        'min_ms': float(seconds.min() * 1000),
+        'median_ms': float(np.median(seconds) * 1000),
+        'mean_ms': float(seconds.mean() * 1000),
+        'std_ms': float(seconds.std() * 1000),
+        'items_per_sec': float(items / np.median(seconds))
+    }
+
+def benchmark_suite(scale=10.0, repeats=5, batch_sizes=(1, 8, 32, 128), sequence_lengths=(32, 128, 256),
+                    rnn_path='./rnn-model', distilbert_path='./destilbert-model'):
+    """Fixed-seed timings of every pipeline stage; `scale` multiplies the data.py corpus size."""
+    import os
+    import torch
+    from torch.utils.data import DataLoader
+    from models import CongressionalRNN
+    from train_rnn import (BucketBatchSampler, CongressionalRNNDataset, build_vocabulary, pad_collate,
+                           texts_to_sequences, train_rnn_model)
+
+    torch.manual_seed(42)
+    n_texts = max(int(len(create_congressional_rhetoric_dataset()) * scale), max(batch_sizes))
+    texts, labels = synthetic_corpus(n_texts)
+    results = {'corpus': {'texts': n_texts, 'words': sum(len(text.split()) for text in texts)}}
+
+    def record(name, timing):
+        results[name] = timing
+        print(f"{name:<40} median {timing['median_ms']:10.2f} ms  {timing['items_per_sec']:12.1f} items/s")
+
+    record('build_vocabulary', time_repeats(lambda _: build_vocabulary(texts), repeats, n_texts))
+    vocab, word_to_idx = build_vocabulary(texts)
+    record('texts_to_sequences', time_repeats(lambda _: texts_to_sequences(texts, word_to_idx), repeats, n_texts))
+
+    dataset = CongressionalRNNDataset(texts_to_sequences(texts, word_to_idx), labels)
+    loader = DataLoader(dataset, batch_sampler=BucketBatchSampler(dataset.lengths, 32), collate_fn=pad_collate)
+    val_loader = DataLoader(dataset, batch_sampler=BucketBatchSampler(dataset.lengths, 128, shuffle=False),
+                            collate_fn=pad_collate)
+    record('train_rnn_model/1_epoch', time_repeats(
+        lambda model: train_rnn_model(model, loader, val_loader, epochs=1), max(1, repeats // 2), n_texts,
+        setup=lambda: CongressionalRNN(len(vocab), pack_sequences=True)
+    ))
+
+    model = CongressionalRNN(len(vocab), pack_sequences=True).eval()
+    for batch_size in batch_sizes:
+        for length in sequence_lengths:
+            sequences = torch.randint(2, len(vocab), (batch_size, length))
+            lengths = torch.full((batch_size,), length, dtype=torch.long)
+            with torch.no_grad():
+                record(f'rnn_forward/batch_{batch_size}/len_{length}',
+                       time_repeats(lambda _: model(sequences, lengths), repeats, batch_size))
+
+    if os.path.exists(distilbert_path):
+        from inference import load_distilbert
+
+        bert, tokenizer = load_distilbert(distilbert_path)
+        bert.eval()
+        record('distilbert_tokenize', time_repeats(
+            lambda _: tokenizer(texts, truncation=True, max_length=512, padding=True), repeats, n_texts
+        ))
+        for batch_size in batch_sizes:
+            inputs = tokenizer(texts[:batch_size], return_tensors='pt', truncation=True, max_length=512, padding=True)
+            with torch.no_grad():
+                record(f'distilbert_forward/batch_{batch_size}/len_{inputs["input_ids"].size(1)}',
+                       time_repeats(lambda _: bert(**inputs), repeats, batch_size))
+    else:
+        print(f"distilbert: skipped ('{distilbert_path}' not found)")
+
+    models = [name for name, path in (('distilbert', distilbert_path), ('rnn', rnn_path)) if os.path.exists(path)]
+    if models:
+        from inference import CongressionalClassifier
+
+        classifier = CongressionalClassifier(distilbert_path, rnn_path, models=models)
+        record(f'predict/{"+".join(models)}/single', time_repeats(lambda _: classifier.predict(texts[0]), repeats * 10))
+        batch = texts[:max(batch_sizes)]
+        record(f'predict/{"+".join(models)}/batch_{len(batch)}',
+               time_repeats(lambda _: classifier.predict_batch(batch), repeats, len(batch)))
+    return results
+
+BENCHMARKS = {
+    'artifact_load': benchmark_artifact_load,
+    'ddp_scaling': benchmark_ddp_scaling,
+    'encoding': benchmark_encoding,
+    'exported_runtimes': benchmark_exported_runtimes,
+    'logits_head': benchmark_logits_head,
+    'micro_batching': benchmark_micro_batching,
+    'packed_forward': benchmark_packed_forward,
+    'rnn_epoch': benchmark_rnn_epoch,
+    'suite': benchmark_suite,
+    'vocabulary': benchmark_vocabulary
+}
+
+def main():
+    import inspect
+
+    parser = argparse.ArgumentParser(description='Run performance benchmarks')
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run (default: all of {', '.join(sorted(BENCHMARKS))})")
+    parser.add_argument('--output', help='write the environment and every benchmark result to this JSON file')
+    parser.add_argument('--scale', type=float, help='corpus size as a multiple of data.py (suite only)')
+    parser.add_argument('--repeats', type=int, help='timed repetitions, for benchmarks that take them')
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    options = {key: value for key, value in (('scale', args.scale), ('repeats', args.repeats)) if value is not None}
+    report = {'environment': environment_info(), 'benchmarks': {}}
+    for name in args.names or sorted(BENCHMARKS):
+        print(f"== {name} ==")
+        accepted = inspect.signature(BENCHMARKS[name]).parameters
+        report['benchmarks'][name] = BENCHMARKS[name](**{k: v for k, v in options.items() if k in accepted})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# cascade.py - RNN-first cascade that escalates low-confidence texts to DistilBERT
+import argparse
+import numpy as np
+import torch
+from models import predict_from_logits
+from inference import CongressionalClassifier, batched_inference
+from test_models import evaluation_split
+
+class CascadeClassifier:
+    """Scores every text with the RNN; texts below `threshold` confidence are re-scored by DistilBERT in batches."""
+
+    def __init__(self, classifier=None, threshold=0.9, batch_size=32):
+        self.classifier = classifier or CongressionalClassifier(batch_size=batch_size)
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.texts_seen = 0
+        self.texts_escalated = 0
+
+    def predict_batch(self, texts, threshold=None):
+        if not texts:
+            return []
+        threshold = self.threshold if threshold is None else threshold
+        texts = [str(text) for text in texts]
+        rnn_predictions, rnn_confidences = predict_from_logits(
+            batched_inference(texts, self.classifier.batch_fns['rnn'], self.batch_size)
+        )
+        results = [
+            {'label': label, 'confidence': confidence, 'model': 'rnn'}
+            for label, confidence in zip(rnn_predictions.tolist(), rnn_confidences.tolist())
+        ]
+
+        escalated = (rnn_confidences < threshold).nonzero().flatten().tolist()
+        if escalated:
+            predictions, confidences = predict_from_logits(batched_inference(
+                [texts[i] for i in escalated], self.classifier.batch_fns['distilbert'], self.batch_size
+            ))
+            for i, label, confidence in zip(escalated, predictions.tolist(), confidences.tolist()):
+                results[i] = {'label': label, 'confidence': confidence, 'model': 'distilbert'}
+
+        self.texts_seen += len(texts)
+        self.texts_escalated += len(escalated)
+        return results
+
+    def predict(self, text, threshold=None):
+        return self.predict_batch([text], threshold)[0]
+
+    def metrics(self):
+        return {
+            'threshold': self.threshold,
+            'texts': self.texts_seen,
+            'escalated': self.texts_escalated,
+            'escalation_rate': self.texts_escalated / self.texts_seen if self.texts_seen else 0.0
+        }
+
+def cascade_report(classifier, texts, labels, thresholds):
+    # Both models score every text once; each threshold then only changes which prediction is kept.
+    rnn_predictions, rnn_confidences = predict_from_logits(
+        batched_inference(texts, classifier.batch_fns['rnn'], classifier.batch_size)
+    )
+    bert_predictions, _ = predict_from_logits(
+        batched_inference(texts, classifier.batch_fns['distilbert'], classifier.batch_size)
+    )
+    labels = torch.as_tensor(np.asarray(labels))
+
+    rnn_accuracy = float((rnn_predictions == labels).float().mean())
+    bert_accuracy = float((bert_predictions == labels).float().mean())
+    print(f"RNN only: {rnn_accuracy:.4f}, DistilBERT only: {bert_accuracy:.4f}")
+    print("Threshold  Escalated  Accuracy")
+
+    rows = []
+    for threshold in thresholds:
+        escalate = rnn_confidences < threshold
+        predictions = torch.where(escalate, bert_predictions, rnn_predictions)
+        row = {
+            'threshold': threshold,
+            'escalated_fraction': float(escalate.float().mean()),
+            'accuracy': float((predictions == labels).float().mean())
+        }
+        rows.append(row)
+        print(f"{threshold:9.2f}  {row['escalated_fraction']:8.1%}  {row['accuracy']:8.4f}")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Accuracy vs. DistilBERT escalation rate for the RNN-first cascade')
+    parser.add_argument('--thresholds', nargs='+', type=float,
+                        default=[0.0, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.01])
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    texts, labels = evaluation_split()
+    classifier = CongressionalClassifier(batch_size=args.batch_size)
+    cascade_report(classifier, texts, labels, args.thresholds)
+
+if __name__ == "__main__":
+    main()
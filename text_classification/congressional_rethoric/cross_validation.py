@@ -0,0 +1,197 @@
+# cross_validation.py - Stratified k-fold / repeated-split accuracy for the RNN and DistilBERT
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import numpy as np
+from sklearn.model_selection import RepeatedStratifiedKFold, StratifiedShuffleSplit
+from data import create_congressional_rhetoric_dataset
+from encoding import PAD_IDX, UNK_IDX, encode_texts, tokenize
+
+NUM_CLASSES = 3
+
+def make_splits(labels, folds=5, repeats=1, test_size=None, seed=42):
+    # test_size switches from k-fold to `repeats` independent stratified train/test splits.
+    if test_size:
+        splitter = StratifiedShuffleSplit(n_splits=repeats, test_size=test_size, random_state=seed)
+    else:
+        splitter = RepeatedStratifiedKFold(n_splits=folds, n_repeats=repeats, random_state=seed)
+    return list(splitter.split(np.zeros(len(labels)), labels))
+
+def encode_corpus(texts, data_dir):
+    # Every word gets an id and nothing is truncated, so each fold can rebuild its own vocabulary
+    # from these ids without re-tokenizing.
+    from train_rnn import build_vocabulary
+
+    vocab, word_to_idx = build_vocabulary(texts, max_vocab=None)
+    max_length = max(max(len(tokenize(text)) for text in texts), 1)
+    np.save(os.path.join(data_dir, 'ids.npy'), encode_texts(texts, word_to_idx, max_length, dtype=np.int32))
+    return vocab
+
+def fold_vocabulary(ids, train_index, vocab, max_vocab=10000):
+    # Same ranking build_vocabulary gives on the fold's training texts: count descending, ties broken
+    # by first occurrence. Returns the fold vocabulary and a corpus-id -> fold-id lookup table.
+    tokens = ids[train_index]
+    tokens = tokens[tokens != PAD_IDX]
+    counts = np.bincount(tokens, minlength=len(vocab))
+    words, first_seen = np.unique(tokens, return_index=True)
+    words = words[np.argsort(first_seen, kind='stable')]
+    ranked = words[np.argsort(-counts[words], kind='stable')][:max_vocab - 2]
+
+    remap = np.full(len(vocab), UNK_IDX, dtype=np.int64)
+    remap[PAD_IDX] = PAD_IDX
+    remap[ranked] = np.arange(2, len(ranked) + 2)
+    return vocab[:2] + [vocab[i] for i in ranked], remap
+
+def confusion_matrix(labels, predictions):
+    return np.bincount(np.asarray(labels) * NUM_CLASSES + np.asarray(predictions),
+                       minlength=NUM_CLASSES * NUM_CLASSES).reshape(NUM_CLASSES, NUM_CLASSES)
+
+def run_rnn_fold(fold, train_index, val_index, labels, data_dir, vocab, options, threads):
+    import torch
+    from torch.utils.data import DataLoader
+    from models import CongressionalRNN
+    from train_rnn import BucketBatchSampler, CongressionalRNNDataset, evaluate_rnn, pad_collate, train_rnn_model
+
+    torch.set_num_threads(threads)
+    torch.manual_seed(42 + fold)
+    ids = np.load(os.path.join(data_dir, 'ids.npy'), mmap_mode='r')
+    fold_vocab, remap = fold_vocabulary(ids, train_index, vocab, options['max_vocab'])
+
+    def loader(index, shuffle):
+        dataset = CongressionalRNNDataset(remap[ids[index, :options['max_length']]], labels[index])
+        return DataLoader(dataset, collate_fn=pad_collate,
+                          batch_sampler=BucketBatchSampler(dataset.lengths, options['batch_size'], shuffle=shuffle))
+
+    train_loader, val_loader = loader(train_index, True), loader(val_index, False)
+    model = CongressionalRNN(len(fold_vocab), pack_sequences=True)
+    # Evaluated once after the last epoch: picking the best epoch on the held-out fold would bias the estimate.
+    model, _ = train_rnn_model(model, train_loader, val_loader, epochs=options['epochs'],
+                               eval_interval=options['epochs'], lr=options['lr'])
+    accuracy, confusion = evaluate_rnn(model, val_loader, NUM_CLASSES)
+    return 'rnn', fold, accuracy, confusion.numpy()
+
+def run_distilbert_fold(fold, train_index, val_index, texts, labels, options, threads):
+    import torch
+    from torch.utils.data import Subset
+    from transformers import (DataCollatorWithPadding, DistilBertForSequenceClassification, DistilBertTokenizer,
+                              Trainer, TrainingArguments)
+    from train_destilbert import CongressionalDistilBertDataset, model_checkpoint
+
+    torch.set_num_threads(threads)
+    tokenizer = DistilBertTokenizer.from_pretrained(model_checkpoint)
+    model = DistilBertForSequenceClassification.from_pretrained(model_checkpoint, num_labels=NUM_CLASSES)
+    # The parent process already filled the token cache, so this is a single np.load.
+    dataset = CongressionalDistilBertDataset(texts, labels, tokenizer)
+
+    trainer = Trainer(
+        model=model,
+        args=TrainingArguments(
+            output_dir=os.path.join(options['output_dir'], f'fold-{fold}'),
+            num_train_epochs=options['distilbert_epochs'],
+            per_device_train_batch_size=8,
+            per_device_eval_batch_size=8,
+            group_by_length=True,
+            save_strategy='no',
+            report_to=[],
+            seed=42 + fold,
+        ),
+        train_dataset=Subset(dataset, train_index),
+        data_collator=DataCollatorWithPadding(tokenizer)
+    )
+    trainer.train()
+    predictions = trainer.predict(Subset(dataset, val_index)).predictions.argmax(axis=1)
+    val_labels = labels[val_index]
+    return 'distilbert', fold, float((predictions == val_labels).mean()), confusion_matrix(val_labels, predictions)
+
+def run_task(task):
+    fold_fn, args = task
+    return fold_fn(*args)
+
+def summarize(name, accuracies, confusions):
+    accuracies = np.asarray(accuracies)
+    total = np.sum(confusions, axis=0)
+    recall = np.diag(total) / np.maximum(total.sum(axis=1), 1)
+    summary = {
+        'folds': len(accuracies),
+        'accuracy_mean': float(accuracies.mean()),
+        'accuracy_std': float(accuracies.std(ddof=1)) if len(accuracies) > 1 else 0.0,
+        'accuracy_per_fold': accuracies.tolist(),
+        'confusion_total': total.tolist(),
+        'confusion_per_fold': [confusion.tolist() for confusion in confusions],
+        'recall_per_class': recall.tolist()
+    }
+    print(f"{name}: accuracy {summary['accuracy_mean']:.4f} +/- {summary['accuracy_std']:.4f} "
+          f"over {len(accuracies)} folds (min {accuracies.min():.4f}, max {accuracies.max():.4f})")
+    print("  Confusion matrix summed over folds (rows = true label):")
+    print(total)
+    print(f"  Per-class recall: {', '.join(f'{label}: {value:.4f}' for label, value in enumerate(recall))}")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-validated accuracy for the RNN and DistilBERT')
+    parser.add_argument('--models', nargs='+', choices=['distilbert', 'rnn'], default=['rnn'])
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=1, help='repeat k-fold (or the random split) this many times')
+    parser.add_argument('--test-size', type=float, default=None,
+                        help='use repeated stratified train/test splits of this size instead of k-fold')
+    parser.add_argument('--epochs', type=int, default=50, help='RNN epochs per fold')
+    parser.add_argument('--lr', type=float, default=0.1)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--max-vocab', type=int, default=10000)
+    parser.add_argument('--distilbert-epochs', type=float, default=3)
+    parser.add_argument('--workers', type=int, default=None, help='folds run at once (default: one per core)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='write the per-fold results as JSON')
+    args = parser.parse_args()
+
+    df = create_congressional_rhetoric_dataset()
+    texts = [str(text) for text in df['text'].values]
+    labels = np.asarray(df['label'].values, dtype=np.int64)
+    splits = make_splits(labels, args.folds, args.repeats, args.test_size, args.seed)
+    workers = args.workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    options = {
+        'epochs': args.epochs,
+        'lr': args.lr,
+        'batch_size': args.batch_size,
+        'max_vocab': args.max_vocab,
+        'max_length': 256,
+        'distilbert_epochs': args.distilbert_epochs,
+        'output_dir': './results/cross-validation'
+    }
+    print(f"{len(splits)} splits of {len(texts)} texts; {workers} processes x {threads} threads")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        tasks = []
+        if 'rnn' in args.models:
+            vocab = encode_corpus(texts, data_dir)
+            tasks += [(run_rnn_fold, (fold, train_index, val_index, labels, data_dir, vocab, options, threads))
+                      for fold, (train_index, val_index) in enumerate(splits)]
+        if 'distilbert' in args.models:
+            from transformers import DistilBertTokenizer
+            from train_destilbert import model_checkpoint, tokenize_texts
+
+            tokenize_texts(texts, DistilBertTokenizer.from_pretrained(model_checkpoint))
+            tasks += [(run_distilbert_fold, (fold, train_index, val_index, texts, labels, options, threads))
+                      for fold, (train_index, val_index) in enumerate(splits)]
+
+        results = {name: {} for name in args.models}
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(min(workers, len(tasks))) as pool:
+            for name, fold, accuracy, confusion in pool.imap_unordered(run_task, tasks):
+                results[name][fold] = (accuracy, confusion)
+                print(f"{name} fold {fold}: accuracy {accuracy:.4f}")
+
+    report = {'splits': len(splits), 'test_size': args.test_size, 'folds': args.folds, 'repeats': args.repeats}
+    for name in args.models:
+        folds = [results[name][fold] for fold in sorted(results[name])]
+        report[name] = summarize(name, [accuracy for accuracy, _ in folds], [confusion for _, confusion in folds])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
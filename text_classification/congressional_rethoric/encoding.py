@@ -0,0 +1,52 @@
+# encoding.py - Shared word-level encoder for the RNN tokenization path
+from itertools import chain, islice, repeat
+import numpy as np
+
+PAD_IDX = 0
+UNK_IDX = 1
+
+def tokenize(text):
+    return text.lower().split()
+
+def encode_chunk(texts, word_to_idx, max_length=256, dtype=np.int64, out=None):
+    tokens = [tokenize(text)[:max_length] for text in texts]
+    lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+
+    if out is None:
+        out = np.zeros((len(tokens), max_length), dtype=dtype)
+    else:
+        out[:] = PAD_IDX
+
+    # One dict lookup per word via map, then a single masked write fills each row left to right.
+    ids = np.fromiter(
+        map(word_to_idx.get, chain.from_iterable(tokens), repeat(UNK_IDX)),
+        dtype=out.dtype, count=int(lengths.sum())
+    )
+    out[np.arange(max_length) < lengths[:, None]] = ids
+    return out, lengths
+
+def iter_encoded_chunks(texts, word_to_idx, max_length=256, dtype=np.int64, chunk_size=65536):
+    texts = iter(texts)
+    while True:
+        chunk = list(islice(texts, chunk_size))
+        if not chunk:
+            return
+        yield encode_chunk(chunk, word_to_idx, max_length, dtype)
+
+def encode_texts(texts, word_to_idx, max_length=256, dtype=np.int64, chunk_size=65536, return_lengths=False):
+    if not hasattr(texts, '__len__'):
+        chunks = list(iter_encoded_chunks(texts, word_to_idx, max_length, dtype, chunk_size))
+        if chunks:
+            out = np.concatenate([ids for ids, _ in chunks])
+            lengths = np.concatenate([chunk_lengths for _, chunk_lengths in chunks])
+        else:
+            out = np.zeros((0, max_length), dtype=dtype)
+            lengths = np.zeros(0, dtype=np.int64)
+        return (out, lengths) if return_lengths else out
+
+    out = np.empty((len(texts), max_length), dtype=dtype)
+    lengths = np.empty(len(texts), dtype=np.int64)
+    for start in range(0, len(texts), chunk_size):
+        stop = min(start + chunk_size, len(texts))
+        _, lengths[start:stop] = encode_chunk(texts[start:stop], word_to_idx, max_length, dtype, out=out[start:stop])
+    return (out, lengths) if return_lengths else out
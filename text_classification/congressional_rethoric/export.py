@@ -0,0 +1,176 @@
+# export.py - TorchScript / ONNX export of both classifiers and a graph-runtime inference path
+import argparse
+import os
+import torch
+import torch.nn as nn
+from artifacts import load_rnn_files
+from encoding import encode_texts
+
+EXPORT_FILES = {
+    'torchscript': 'model.torchscript.pt',
+    'onnx': 'model.onnx'
+}
+
+class ExportableRNN(nn.Module):
+    """Graph-friendly CongressionalRNN forward taking (input_ids, lengths).
+
+    Packed sequences do not export, so pack_sequences models run the LSTMs over the padded batch
+    and read each row at its last real token. A unidirectional LSTM's output at step t depends only
+    on steps <= t, so this matches the packed final hidden state.
+    """
+
+    def __init__(self, model):
+        super(ExportableRNN, self).__init__()
+        self.model = model
+
+    def forward(self, input_ids, lengths):
+        model = self.model
+        embedded = model.embedding(input_ids)
+        lstm1_out, _ = model.lstm1(embedded)
+        lstm2_out, _ = model.lstm2(lstm1_out)
+        if model.pack_sequences:
+            index = (lengths.clamp(min=1) - 1).view(-1, 1, 1).expand(-1, 1, lstm2_out.size(2))
+            last_output = lstm2_out.gather(1, index).squeeze(1)
+        else:
+            last_output = lstm2_out[:, -1, :]
+        return model.fc(last_output)
+
+class ExportableDistilBert(nn.Module):
+    def __init__(self, model):
+        super(ExportableDistilBert, self).__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+def rnn_example_inputs(vocab_size, batch_size=2, max_length=16):
+    input_ids = torch.randint(2, vocab_size, (batch_size, max_length))
+    lengths = torch.full((batch_size,), max_length, dtype=torch.long)
+    return input_ids, lengths
+
+def distilbert_example_inputs(tokenizer):
+    encoding = tokenizer(['Mr. Speaker, I yield back.', 'The committee will markup the bill on Tuesday.'],
+                         padding=True, return_tensors='pt')
+    return encoding['input_ids'], encoding['attention_mask']
+
+def export_module(module, example_inputs, input_names, output_name, path, runtime, opset=17):
+    module = module.eval()
+    if runtime == 'torchscript':
+        with torch.no_grad():
+            traced = torch.jit.trace(module, example_inputs, strict=False)
+        torch.jit.save(traced, path)
+    elif runtime == 'onnx':
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+        dynamic_axes.update({'lengths': {0: 'batch'}} if 'lengths' in input_names else {})
+        dynamic_axes[output_name] = {0: 'batch'}
+        torch.onnx.export(
+            module, example_inputs, path,
+            input_names=list(input_names), output_names=[output_name],
+            dynamic_axes=dynamic_axes, opset_version=opset
+        )
+    else:
+        raise ValueError(f'unknown export runtime {runtime!r}')
+    return path
+
+def export_rnn(model, model_path, runtime, output_dir=None):
+    path = os.path.join(output_dir or model_path, EXPORT_FILES[runtime])
+    example_inputs = rnn_example_inputs(model.embedding.num_embeddings)
+    return export_module(ExportableRNN(model), example_inputs, ('input_ids', 'lengths'), 'logits', path, runtime)
+
+def export_distilbert(model, tokenizer, model_path, runtime, output_dir=None):
+    path = os.path.join(output_dir or model_path, EXPORT_FILES[runtime])
+    example_inputs = distilbert_example_inputs(tokenizer)
+    return export_module(ExportableDistilBert(model), example_inputs, ('input_ids', 'attention_mask'), 'logits',
+                         path, runtime)
+
+class TorchScriptRuntime:
+    def __init__(self, path):
+        self.module = torch.jit.load(path).eval()
+
+    def __call__(self, *inputs):
+        with torch.no_grad():
+            return self.module(*inputs)
+
+class OnnxRuntime:
+    def __init__(self, path, num_threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError as error:
+            raise ImportError('the onnx runtime path requires onnxruntime') from error
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def __call__(self, *inputs):
+        feeds = {name: tensor.numpy() for name, tensor in zip(self.input_names, inputs)}
+        return torch.from_numpy(self.session.run(None, feeds)[0])
+
+RUNTIMES = {
+    'torchscript': TorchScriptRuntime,
+    'onnx': OnnxRuntime
+}
+
+def load_runtime(model_path, runtime):
+    return RUNTIMES[runtime](os.path.join(model_path, EXPORT_FILES[runtime]))
+
+def rnn_graph_logits(graph, word_to_idx, pack_sequences, texts):
+    sequences, lengths = encode_texts(texts, word_to_idx, return_lengths=True)
+    sequences = torch.from_numpy(sequences)
+    if pack_sequences:
+        sequences = sequences[:, :max(int(lengths.max()), 1)].contiguous()
+    return graph(sequences, torch.from_numpy(lengths))
+
+def distilbert_graph_logits(graph, tokenizer, texts):
+    inputs = tokenizer(list(texts), return_tensors='pt', truncation=True, max_length=512, padding=True)
+    return graph(inputs['input_ids'], inputs['attention_mask'])
+
+def load_rnn_graph(model_path, runtime, allow_legacy=False):
+    config, vocab, _ = load_rnn_files(model_path, allow_legacy)
+    word_to_idx = {word: idx for idx, word in enumerate(vocab)}
+    return load_runtime(model_path, runtime), word_to_idx, config.get('pack_sequences', False)
+
+def check_parity(name, eager_fn, graph_fn, texts, atol=1e-4):
+    from inference import batched_inference
+
+    expected = batched_inference(texts, eager_fn)
+    actual = batched_inference(texts, graph_fn)
+    max_diff = float((expected - actual).abs().max())
+    same_predictions = bool((expected.argmax(dim=1) == actual.argmax(dim=1)).all())
+    print(f"{name}: max |eager - exported| = {max_diff:.2e}, identical predictions: {same_predictions}")
+    if max_diff > atol or not same_predictions:
+        raise AssertionError(f'{name} exported outputs differ from eager beyond atol={atol}')
+    return max_diff
+
+def main():
+    from functools import partial
+    from inference import distilbert_logits, load_distilbert, load_rnn, rnn_logits
+    from test_models import evaluation_split
+
+    parser = argparse.ArgumentParser(description='Export the classifiers to TorchScript / ONNX and check parity')
+    parser.add_argument('--models', nargs='+', choices=['distilbert', 'rnn'], default=['distilbert', 'rnn'])
+    parser.add_argument('--runtimes', nargs='+', choices=sorted(RUNTIMES), default=sorted(RUNTIMES))
+    parser.add_argument('--distilbert-path', default='./destilbert-model')
+    parser.add_argument('--rnn-path', default='./rnn-model')
+    parser.add_argument('--atol', type=float, default=1e-4)
+    args = parser.parse_args()
+
+    texts, _ = evaluation_split()
+    for runtime in args.runtimes:
+        if 'rnn' in args.models:
+            model, word_to_idx = load_rnn(args.rnn_path)
+            print(f"Exported RNN to {export_rnn(model, args.rnn_path, runtime)}")
+            graph, _, pack_sequences = load_rnn_graph(args.rnn_path, runtime)
+            check_parity(f'RNN/{runtime}', partial(rnn_logits, model, word_to_idx),
+                         partial(rnn_graph_logits, graph, word_to_idx, pack_sequences), texts, args.atol)
+        if 'distilbert' in args.models:
+            model, tokenizer = load_distilbert(args.distilbert_path)
+            print(f"Exported DistilBERT to {export_distilbert(model, tokenizer, args.distilbert_path, runtime)}")
+            graph = load_runtime(args.distilbert_path, runtime)
+            check_parity(f'DistilBERT/{runtime}', partial(distilbert_logits, model, tokenizer),
+                         partial(distilbert_graph_logits, graph, tokenizer), texts, args.atol)
+
+if __name__ == "__main__":
+    main()
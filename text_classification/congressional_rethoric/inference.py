@@ -0,0 +1,185 @@
+# inference.py - Model loading, length-bucketed batch inference and the CongressionalClassifier used for serving
+import threading
+import time
+from collections import deque
+from functools import partial
+import torch
+from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
+from artifacts import directory_fingerprint, load_rnn_files
+from encoding import encode_texts
+import instrumentation
+from export import distilbert_graph_logits, load_rnn_graph, load_runtime, rnn_graph_logits
+from models import CongressionalRNN, predict_from_logits
+from prediction_cache import cache_key
+from quantization import load_quantized, quantize_distilbert, quantize_rnn
+
+def load_distilbert(model_path='./destilbert-model', quantized=False):
+    model = DistilBertForSequenceClassification.from_pretrained(model_path)
+    tokenizer = DistilBertTokenizer.from_pretrained(model_path)
+    if quantized:
+        model = load_quantized(model, quantize_distilbert)
+    return model, tokenizer
+
+def load_rnn(model_path='./rnn-model', quantized=False, allow_legacy=False):
+    config, vocab, state_dict = load_rnn_files(model_path, allow_legacy)
+    
+    model = CongressionalRNN(**config)
+    # assign=True keeps the memory-mapped weights instead of copying them into fresh parameters.
+    model.load_state_dict(state_dict, assign=True)
+    model.eval()
+    if quantized:
+        model = load_quantized(model, quantize_rnn)
+    
+    return model, {word: idx for idx, word in enumerate(vocab)}
+
+def text_to_sequence(text, word_to_idx, max_length=256):
+    return torch.from_numpy(encode_texts([text], word_to_idx, max_length))
+
+def length_sorted_batches(texts, batch_size):
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i].split()))
+    for start in range(0, len(order), batch_size):
+        yield order[start:start + batch_size]
+
+def distilbert_logits(model, tokenizer, texts):
+    with instrumentation.stage('distilbert/tokenize'):
+        inputs = tokenizer(list(texts), return_tensors='pt', truncation=True, max_length=512, padding=True)
+    with instrumentation.stage('distilbert/forward'), torch.no_grad():
+        return model(**inputs).logits
+
+def rnn_logits(model, word_to_idx, texts):
+    with instrumentation.stage('rnn/tokenize'):
+        sequences, lengths = encode_texts(texts, word_to_idx, return_lengths=True)
+    with instrumentation.stage('rnn/forward'), torch.no_grad():
+        return model(torch.from_numpy(sequences), torch.from_numpy(lengths))
+
+def batched_inference(texts, batch_fn, batch_size=32):
+    # Similar lengths share a batch so padding stays short; outputs come back in input order.
+    outputs = [None] * len(texts)
+    for indices in length_sorted_batches(texts, batch_size):
+        batch_outputs = batch_fn([texts[i] for i in indices])
+        for i, output in zip(indices, batch_outputs):
+            outputs[i] = output
+    return torch.stack(outputs)
+
+class LatencyTracker:
+    def __init__(self, window=1000):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.recent = deque(maxlen=window)
+        self.lock = threading.Lock()
+    
+    def record(self, seconds):
+        with self.lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.recent.append(seconds)
+    
+    def summary(self):
+        with self.lock:
+            recent = sorted(self.recent)
+        if not recent:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean_ms': 1000 * self.total_seconds / self.count,
+            'p50_ms': 1000 * recent[len(recent) // 2],
+            'p99_ms': 1000 * recent[min(len(recent) - 1, int(len(recent) * 0.99))],
+            'max_ms': 1000 * recent[-1]
+        }
+
+class CongressionalClassifier:
+    """Loads both models once and keeps them in eval mode for repeated predictions."""
+    
+    def __init__(self, distilbert_path='./destilbert-model', rnn_path='./rnn-model',
+                 models=('distilbert', 'rnn'), batch_size=32, quantized=False, runtime='eager', cache=None):
+        if quantized and runtime != 'eager':
+            raise ValueError(f'quantized models are only supported with the eager runtime, not {runtime!r}')
+        self.models = tuple(models)
+        self.runtime = runtime
+        self.batch_size = batch_size
+        self.cache = cache
+        self.load_seconds = {}
+        self.batch_fns = {}
+        model_paths = {'distilbert': distilbert_path, 'rnn': rnn_path}
+        self.model_versions = {
+            name: f'{name}:{runtime}:{"int8" if quantized else "fp32"}:{directory_fingerprint(model_paths[name])}'
+            for name in self.models
+        }
+        
+        if 'distilbert' in self.models:
+            start = time.perf_counter()
+            if runtime == 'eager':
+                self.distilbert_model, self.distilbert_tokenizer = load_distilbert(distilbert_path, quantized)
+                self.distilbert_model.eval()
+                self.batch_fns['distilbert'] = partial(distilbert_logits, self.distilbert_model, self.distilbert_tokenizer)
+            else:
+                self.distilbert_tokenizer = DistilBertTokenizer.from_pretrained(distilbert_path)
+                graph = load_runtime(distilbert_path, runtime)
+                self.batch_fns['distilbert'] = partial(distilbert_graph_logits, graph, self.distilbert_tokenizer)
+            self.load_seconds['distilbert'] = time.perf_counter() - start
+        
+        if 'rnn' in self.models:
+            start = time.perf_counter()
+            if runtime == 'eager':
+                self.rnn_model, self.rnn_word_to_idx = load_rnn(rnn_path, quantized)
+                self.batch_fns['rnn'] = partial(rnn_logits, self.rnn_model, self.rnn_word_to_idx)
+            else:
+                graph, self.rnn_word_to_idx, pack_sequences = load_rnn_graph(rnn_path, runtime)
+                self.batch_fns['rnn'] = partial(rnn_graph_logits, graph, self.rnn_word_to_idx, pack_sequences)
+            self.load_seconds['rnn'] = time.perf_counter() - start
+        
+        self.latency = LatencyTracker()
+    
+    def predict_model(self, name, texts):
+        instrumentation.count(f'{name}/texts', len(texts))
+        if self.cache is None:
+            logits = batched_inference(texts, self.batch_fns[name], self.batch_size)
+            with instrumentation.stage(f'{name}/postprocess'):
+                predictions, confidences = predict_from_logits(logits)
+                return [{'label': pred, 'confidence': confidence}
+                        for pred, confidence in zip(predictions.tolist(), confidences.tolist())]
+        
+        # Cached texts skip tokenization and the forward pass; repeats within the batch are scored once.
+        keys = [cache_key(text, self.model_versions[name]) for text in texts]
+        found = self.cache.get_many(keys)
+        pending = {}
+        for text, key in zip(texts, keys):
+            if key not in found:
+                pending.setdefault(key, text)
+        if pending:
+            instrumentation.count(f'{name}/cache_misses', len(pending))
+            logits = batched_inference(list(pending.values()), self.batch_fns[name], self.batch_size)
+            with instrumentation.stage(f'{name}/postprocess'):
+                predictions, confidences = predict_from_logits(logits)
+                computed = {
+                    key: {'label': pred, 'confidence': confidence}
+                    for key, pred, confidence in zip(pending, predictions.tolist(), confidences.tolist())
+                }
+            self.cache.put_many(computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+    
+    def predict_batch(self, texts):
+        if not texts:
+            return []
+        start = time.perf_counter()
+        texts = [str(text) for text in texts]
+        results = [{} for _ in texts]
+        for name in self.models:
+            for result, prediction in zip(results, self.predict_model(name, texts)):
+                result[name] = prediction
+        self.latency.record(time.perf_counter() - start)
+        return results
+    
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+    
+    def metrics(self):
+        return {
+            'models': list(self.models),
+            'runtime': self.runtime,
+            'model_versions': self.model_versions,
+            'load_seconds': self.load_seconds,
+            'latency': self.latency.summary(),
+            'cache': self.cache.stats() if self.cache is not None else None
+        }
@@ -0,0 +1,227 @@
+# instrumentation.py - Opt-in stage timers, counters and profiler capture for training and inference
+import argparse
+import cProfile
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+# Upper bounds in seconds for the per-stage histograms; the last bucket is +Inf.
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+MAX_TRACE_EVENTS = 200000
+
+_enabled = os.environ.get('RHETORIC_INSTRUMENTATION', '') not in ('', '0')
+_record_functions = False
+_lock = threading.Lock()
+_null_stage = nullcontext()
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+_stages = {}
+_counters = {}
+_events = deque(maxlen=MAX_TRACE_EVENTS)
+_origin = time.perf_counter()
+
+def enable(record_functions=False):
+    global _enabled, _record_functions
+    _enabled = True
+    _record_functions = record_functions
+
+def disable():
+    global _enabled, _record_functions
+    _enabled = False
+    _record_functions = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    global _origin
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+        _events.clear()
+        _origin = time.perf_counter()
+
+def record(name, seconds, start=None):
+    if not _enabled:
+        return
+    start = time.perf_counter() - seconds if start is None else start
+    with _lock:
+        _stages.setdefault(name, StageStats()).add(seconds)
+        _events.append((name, start, seconds, threading.get_ident()))
+
+def count(name, value=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.annotation = None
+
+    def __enter__(self):
+        if _record_functions:
+            from torch.profiler import record_function
+            self.annotation = record_function(self.name)
+            self.annotation.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        if self.annotation is not None:
+            self.annotation.__exit__(*exc_info)
+        record(self.name, end - self.start, self.start)
+        return False
+
+def stage(name):
+    # When instrumentation is off this is one global read and a shared no-op context manager.
+    return Stage(name) if _enabled else _null_stage
+
+def summary():
+    with _lock:
+        stages = {
+            name: {
+                'count': stats.count,
+                'total_seconds': stats.total_seconds,
+                'mean_ms': 1000 * stats.total_seconds / stats.count,
+                'max_ms': 1000 * stats.max_seconds
+            }
+            for name, stats in _stages.items()
+        }
+        return {'stages': stages, 'counters': dict(_counters)}
+
+def print_summary():
+    report = summary()
+    total = sum(stats['total_seconds'] for stats in report['stages'].values()) or 1.0
+    print("Stage                          Calls     Total s   Share    Mean ms     Max ms")
+    for name, stats in sorted(report['stages'].items(), key=lambda item: -item[1]['total_seconds']):
+        print(f"{name:<28} {stats['count']:>8} {stats['total_seconds']:>10.3f} {stats['total_seconds'] / total:>7.1%} "
+              f"{stats['mean_ms']:>10.3f} {stats['max_ms']:>10.3f}")
+    for name, value in sorted(report['counters'].items()):
+        print(f"{name:<28} {value:>8}")
+
+def chrome_trace(path):
+    # Complete ("X") events in microseconds; open in chrome://tracing or ui.perfetto.dev.
+    pid = os.getpid()
+    with _lock:
+        events = [
+            {'name': name, 'ph': 'X', 'ts': (start - _origin) * 1e6, 'dur': seconds * 1e6, 'pid': pid, 'tid': tid}
+            for name, start, seconds, tid in _events
+        ]
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    return path
+
+def prometheus_text(prefix='rhetoric'):
+    lines = [
+        f'# HELP {prefix}_stage_seconds Wall time spent per instrumented stage.',
+        f'# TYPE {prefix}_stage_seconds histogram'
+    ]
+    with _lock:
+        for name, stats in sorted(_stages.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + (float('inf'),), stats.buckets):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stats.total_seconds}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stats.count}')
+        if _counters:
+            lines.append(f'# TYPE {prefix}_events_total counter')
+        for name, value in sorted(_counters.items()):
+            lines.append(f'{prefix}_events_total{{name="{name}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus(path, prefix='rhetoric'):
+    with open(path, 'w') as f:
+        f.write(prometheus_text(prefix))
+    return path
+
+@contextmanager
+def profile(kind=None, path=None):
+    """Wraps a block in cProfile ('cprofile') or torch.profiler ('torch'); kind=None profiles nothing."""
+    global _enabled, _record_functions
+    if kind is None:
+        yield
+    elif kind == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path or 'profile.prof')
+    elif kind == 'torch':
+        from torch.profiler import ProfilerActivity, profile as torch_profile
+
+        # Stages show up as named ranges inside the torch trace while it is being captured.
+        previous = (_enabled, _record_functions)
+        enable(record_functions=True)
+        try:
+            with torch_profile(activities=[ProfilerActivity.CPU], record_shapes=True) as profiler:
+                yield
+        finally:
+            _enabled, _record_functions = previous
+        profiler.export_chrome_trace(path or 'torch-trace.json')
+    else:
+        raise ValueError(f'unknown profiler {kind!r}')
+
+def add_arguments(parser):
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--instrument', action='store_true', help='time pipeline stages and print a breakdown')
+    group.add_argument('--trace-output', help='write stage timings as a Chrome trace (implies --instrument)')
+    group.add_argument('--metrics-output', help='write Prometheus-style stage histograms (implies --instrument)')
+    group.add_argument('--profile', choices=['cprofile', 'torch'], help='capture a profiler run')
+    group.add_argument('--profile-output', help='profiler output file (default: profile.prof / torch-trace.json)')
+    return parser
+
+def configure(args):
+    if args.instrument or args.trace_output or args.metrics_output or args.profile:
+        enable()
+
+def report(args):
+    if not _enabled:
+        return
+    print_summary()
+    if args.trace_output:
+        print(f"Chrome trace written to {chrome_trace(args.trace_output)}")
+    if args.metrics_output:
+        print(f"Stage histograms written to {write_prometheus(args.metrics_output)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Instrumented RNN and DistilBERT inference over the evaluation split')
+    parser.add_argument('--models', nargs='+', choices=['distilbert', 'rnn'], default=['rnn'])
+    parser.add_argument('--batch-size', type=int, default=32)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    from inference import CongressionalClassifier
+    from test_models import evaluation_split
+
+    texts, _ = evaluation_split()
+    classifier = CongressionalClassifier(models=args.models, batch_size=args.batch_size)
+    enable()
+    with profile(args.profile, args.profile_output):
+        classifier.predict_batch(texts)
+    report(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# micro_batching.py - Collects concurrent single-text requests into padded batches
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_STOP = object()
+
+class MicroBatcher:
+    """Runs batch_fn on requests gathered for up to max_latency_ms or max_batch_size items."""
+
+    def __init__(self, batch_fn, max_batch_size=32, max_latency_ms=5.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.batches = 0
+        self.items = 0
+        self.worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self.worker.start()
+
+    def submit(self, text):
+        future = Future()
+        # Checked under the lock so nothing can be queued behind _STOP, where no worker would ever see it.
+        with self.lock:
+            if self.closed:
+                raise RuntimeError('MicroBatcher is closed')
+            self.requests.put((text, future))
+        return future
+
+    def predict(self, text, timeout=None):
+        return self.submit(text).result(timeout)
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.requests.put(_STOP)
+        self.worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _collect(self):
+        first = self.requests.get()
+        if first is _STOP:
+            return None, True
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if not batch:
+                continue
+
+            texts = [text for text, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                results = list(self.batch_fn(texts))
+                if len(results) != len(texts):
+                    raise RuntimeError(f'batch_fn returned {len(results)} results for {len(texts)} inputs')
+            except Exception as error:
+                for future in futures:
+                    future.set_exception(error)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0
+        }
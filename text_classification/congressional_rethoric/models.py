@@ -1,21 +1,56 @@
+import torch
 import torch.nn as nn
+from torch.nn.utils.rnn import pack_padded_sequence
+
+def predict_from_logits(logits):
+    # Argmax and its softmax probability in one pass: p_max = 1 / sum(exp(logits - max_logit)).
+    max_logits, predictions = logits.max(dim=1)
+    confidences = torch.exp(logits - max_logits.unsqueeze(1)).sum(dim=1).reciprocal()
+    return predictions, confidences
 
 class CongressionalRNN(nn.Module):
-    def __init__(self, vocab_size, embedding_dim=100, lstm1_units=64, lstm2_units=32, dropout_rate=0.3, num_classes=3):
+    def __init__(self, vocab_size, embedding_dim=100, lstm1_units=64, lstm2_units=32, dropout_rate=0.3, num_classes=3,
+                 pack_sequences=False):
         super(CongressionalRNN, self).__init__()
+        self.config = {
+            'vocab_size': vocab_size,
+            'embedding_dim': embedding_dim,
+            'lstm1_units': lstm1_units,
+            'lstm2_units': lstm2_units,
+            'dropout_rate': dropout_rate,
+            'num_classes': num_classes,
+            'pack_sequences': pack_sequences
+        }
+        self.pack_sequences = pack_sequences
         self.embedding = nn.Embedding(vocab_size, embedding_dim, padding_idx=0)
         self.lstm1 = nn.LSTM(embedding_dim, lstm1_units, batch_first=True)
         self.lstm2 = nn.LSTM(lstm1_units, lstm2_units, batch_first=True)
         self.dropout = nn.Dropout(dropout_rate)
         self.fc = nn.Linear(lstm2_units, num_classes)
-        self.softmax = nn.Softmax(dim=1)
         
-    def forward(self, x):
-        embedded = self.embedding(x)
-        lstm1_out, _ = self.lstm1(embedded)
-        lstm2_out, _ = self.lstm2(lstm1_out)
-        last_output = lstm2_out[:, -1, :]
+    def forward(self, x, lengths=None):
+        if self.pack_sequences:
+            last_output = self.packed_last_hidden(x, lengths)
+        else:
+            embedded = self.embedding(x)
+            lstm1_out, _ = self.lstm1(embedded)
+            lstm2_out, _ = self.lstm2(lstm1_out)
+            last_output = lstm2_out[:, -1, :]
         dropped = self.dropout(last_output)
         logits = self.fc(dropped)
-        output = self.softmax(logits)
-        return output
+        return logits
+
+    def classify(self, x, lengths=None):
+        with torch.no_grad():
+            return predict_from_logits(self(x, lengths))
+
+    def packed_last_hidden(self, x, lengths=None):
+        # Padding is trailing and PAD is the only id 0, so lengths can be recovered from x when not given.
+        if lengths is None:
+            lengths = (x != 0).sum(dim=1)
+        lengths = lengths.cpu().clamp(min=1)
+        embedded = self.embedding(x[:, :int(lengths.max())])
+        packed = pack_padded_sequence(embedded, lengths, batch_first=True, enforce_sorted=False)
+        lstm1_out, _ = self.lstm1(packed)
+        _, (hidden, _) = self.lstm2(lstm1_out)
+        return hidden[-1]
@@ -0,0 +1,143 @@
+# prediction_cache.py - LRU/TTL cache of per-model predictions keyed by normalized text hash
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+def normalize_text(text):
+    # Both models lowercase and split on whitespace, so case and spacing never change a prediction.
+    return ' '.join(str(text).lower().split())
+
+def cache_key(text, model_version):
+    return hashlib.sha256(f'{model_version}\0{normalize_text(text)}'.encode('utf-8')).hexdigest()
+
+class PredictionCache:
+    """In-memory LRU with optional TTL, optionally backed by a SQLite file that survives restarts.
+
+    The SQLite table keeps at most max_disk_size rows (default max_size). Expired rows are deleted as they are
+    read; once a write takes the table over the cap, expired rows are purged and the oldest-written rows are
+    dropped until a tenth of the cap is free again, so the trimming cost is paid once per many writes.
+    """
+
+    def __init__(self, max_size=100000, ttl_seconds=None, path=None, max_disk_size=None):
+        self.max_size = max_size
+        self.max_disk_size = max_disk_size or max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.db = None
+        self.disk_rows = 0
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)'
+            )
+            self.db.execute('CREATE INDEX IF NOT EXISTS predictions_expires_at ON predictions (expires_at)')
+            self.db.commit()
+            self.disk_rows = self.db.execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
+
+    def _expired(self, expires_at):
+        return expires_at is not None and expires_at <= time.time()
+
+    def _remember(self, key, value, expires_at):
+        self.entries[key] = (value, expires_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, keys):
+        found = {}
+        with self.lock:
+            missing = []
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is not None and self._expired(entry[1]):
+                    del self.entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    missing.append(key)
+                else:
+                    self.entries.move_to_end(key)
+                    found[key] = entry[0]
+
+            if self.db is not None and missing:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows = self.db.execute(
+                        f"SELECT key, value, expires_at FROM predictions WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall()
+                    expired = []
+                    for key, value, expires_at in rows:
+                        if self._expired(expires_at):
+                            expired.append((key,))
+                            continue
+                        found[key] = json.loads(value)
+                        self._remember(key, found[key], expires_at)
+                    if expired:
+                        self.db.executemany('DELETE FROM predictions WHERE key = ?', expired)
+                        self.db.commit()
+                        self.expirations += len(expired)
+                        self.disk_rows -= len(expired)
+
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items):
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self.lock:
+            for key, value in items.items():
+                self._remember(key, value, expires_at)
+            if self.db is not None and items:
+                self.db.executemany(
+                    'INSERT OR REPLACE INTO predictions (key, value, expires_at) VALUES (?, ?, ?)',
+                    [(key, json.dumps(value), expires_at) for key, value in items.items()]
+                )
+                # Replaced keys are counted too; the overestimate only brings the next trim forward.
+                self.disk_rows += len(items)
+                if self.disk_rows > self.max_disk_size:
+                    self._trim_db()
+                self.db.commit()
+
+    def _trim_db(self):
+        # INSERT OR REPLACE gives a rewritten key a new, larger rowid, so rowid order is write order.
+        self.db.execute('DELETE FROM predictions WHERE expires_at <= ?', (time.time(),))
+        keep = self.max_disk_size - self.max_disk_size // 10
+        self.db.execute(
+            'DELETE FROM predictions WHERE rowid <= '
+            '(SELECT rowid FROM predictions ORDER BY rowid DESC LIMIT 1 OFFSET ?)',
+            (keep,)
+        )
+        self.disk_rows = self.db.execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,70 @@
+# quantization.py - Dynamic int8 quantization of the RNN and DistilBERT for CPU inference
+import argparse
+import io
+import os
+import time
+from functools import partial
+import torch
+import torch.nn as nn
+from torch.ao.quantization import quantize_dynamic
+
+QUANTIZED_WEIGHTS = 'model_int8.pth'
+
+def quantize_rnn(model):
+    return quantize_dynamic(model, {nn.LSTM, nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def quantize_distilbert(model):
+    return quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def save_quantized(model, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, QUANTIZED_WEIGHTS)
+    torch.save(model.state_dict(), path)
+    return path
+
+def load_quantized(model, quantize_fn):
+    # Dynamic quantization is deterministic given the fp32 weights, so the int8 model is always rebuilt from them.
+    return quantize_fn(model).eval()
+
+def serialized_size_mb(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description='Accuracy, throughput and size of the int8 models against fp32')
+    parser.add_argument('--output-dir', default=None,
+                        help='also save the int8 state dicts here, one subdirectory per model')
+    args = parser.parse_args()
+
+    from inference import batched_inference, distilbert_logits, load_distilbert, load_rnn, rnn_logits
+    from test_models import evaluation_split
+
+    X_test, y_test = evaluation_split()
+    setups = {
+        'DistilBERT': ('./destilbert-model', load_distilbert, quantize_distilbert, distilbert_logits),
+        'RNN': ('./rnn-model', load_rnn, quantize_rnn, rnn_logits)
+    }
+
+    for name, (model_path, load_fn, quantize_fn, batch_fn) in setups.items():
+        results = {}
+        for quantized in (False, True):
+            model, extra = load_fn(model_path)
+            if quantized:
+                model = quantize_fn(model)
+            start = time.perf_counter()
+            outputs = batched_inference(X_test, partial(batch_fn, model, extra))
+            seconds = time.perf_counter() - start
+            accuracy = float((outputs.argmax(dim=1).numpy() == y_test).mean())
+            results[quantized] = (accuracy, len(X_test) / seconds, serialized_size_mb(model))
+
+        (fp32_acc, fp32_tps, fp32_mb), (int8_acc, int8_tps, int8_mb) = results[False], results[True]
+        print(f"{name}: accuracy {fp32_acc:.4f} -> {int8_acc:.4f} (delta {int8_acc - fp32_acc:+.4f}), "
+              f"throughput {fp32_tps:.1f} -> {int8_tps:.1f} texts/sec ({int8_tps / fp32_tps:.2f}x), "
+              f"weights {fp32_mb:.1f} -> {int8_mb:.1f} MB")
+        if args.output_dir:
+            path = save_quantized(model, os.path.join(args.output_dir, name.lower()))
+            print(f"  int8 weights saved to {path}")
+
+if __name__ == "__main__":
+    main()
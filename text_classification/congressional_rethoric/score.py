@@ -0,0 +1,168 @@
+# score.py - Resumable bulk scoring of text files with the RNN and/or DistilBERT
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from itertools import islice
+from artifacts import directory_fingerprint
+from streaming import SHARD_EXTENSIONS, iter_records, resolve_shards
+
+INPUT_EXTENSIONS = SHARD_EXTENSIONS + ('.txt',)
+PROGRESS_FILE = 'progress.json'
+
+_classifier = None
+
+def init_worker(models, distilbert_path, rnn_path, batch_size, quantized, runtime, threads):
+    # Runs once per pool process: the models stay loaded for every chunk that process scores.
+    global _classifier
+    import torch
+    from inference import CongressionalClassifier
+
+    torch.set_num_threads(threads)
+    _classifier = CongressionalClassifier(distilbert_path, rnn_path, models=models, batch_size=batch_size,
+                                          quantized=quantized, runtime=runtime)
+
+def score_chunk(chunk_index, start_id, records):
+    results = _classifier.predict_batch([text for _, text in records])
+    rows = []
+    for offset, ((source, text), result) in enumerate(zip(records, results)):
+        row = {'id': start_id + offset, 'source': source}
+        for name, prediction in result.items():
+            row[f'{name}_label'] = prediction['label']
+            row[f'{name}_confidence'] = prediction['confidence']
+        rows.append(row)
+    return chunk_index, rows
+
+def iter_inputs(shards, text_field):
+    for shard in shards:
+        for text, _ in iter_records(shard, text_field, label_field=None):
+            yield shard, str(text)
+
+def iter_input_chunks(shards, text_field, chunk_size):
+    records = iter_inputs(shards, text_field)
+    chunk_index = 0
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk_index, chunk_index * chunk_size, chunk
+        chunk_index += 1
+
+def part_path(output_dir, chunk_index, output_format):
+    return os.path.join(output_dir, f'part-{chunk_index:06d}.{output_format}')
+
+def write_part(rows, path, output_format):
+    # Written under a temporary name and renamed, so a part file on disk is always complete.
+    tmp_path = f'{path}.tmp'
+    if output_format == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError('writing Parquet output requires pyarrow') from error
+        pq.write_table(pa.Table.from_pylist(rows), tmp_path)
+    else:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+    os.replace(tmp_path, path)
+
+def load_progress(output_dir, settings, shards, text_field):
+    path = os.path.join(output_dir, PROGRESS_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            progress = json.load(f)
+        if progress['settings'] != settings:
+            raise ValueError(f"{output_dir} holds a run with different settings {progress['settings']}; "
+                             f"resume with the same arguments or choose a new --output")
+        return progress
+    # Counting up front gives the ETA a denominator; it is only done once per output directory.
+    total = sum(1 for _ in iter_inputs(shards, text_field))
+    progress = {'settings': settings, 'total': total}
+    os.makedirs(output_dir, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(progress, f, indent=2)
+    return progress
+
+def format_seconds(seconds):
+    seconds = int(seconds)
+    return f'{seconds // 3600:d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}'
+
+def score(inputs, output_dir, models=('rnn',), text_field='text', output_format='jsonl', chunk_size=10000,
+          workers=None, batch_size=32, quantized=False, runtime='eager', distilbert_path='./destilbert-model',
+          rnn_path='./rnn-model'):
+    shards = resolve_shards(inputs, INPUT_EXTENSIONS)
+    model_paths = {'distilbert': distilbert_path, 'rnn': rnn_path}
+    settings = {
+        'inputs': [os.path.abspath(shard) for shard in shards],
+        'text_field': text_field,
+        'models': {name: directory_fingerprint(model_paths[name]) for name in sorted(models)},
+        'quantized': quantized,
+        'runtime': runtime,
+        'chunk_size': chunk_size,
+        'format': output_format
+    }
+    progress = load_progress(output_dir, settings, shards, text_field)
+    total = progress['total']
+    num_chunks = (total + chunk_size - 1) // chunk_size
+    done = {i for i in range(num_chunks) if os.path.exists(part_path(output_dir, i, output_format))}
+    remaining = total - sum(min(chunk_size, total - i * chunk_size) for i in done)
+    print(f"{total} texts in {len(shards)} file(s), {num_chunks} chunks, {len(done)} already scored")
+    if not remaining:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    initargs = (tuple(models), distilbert_path, rnn_path, batch_size, quantized, runtime, threads)
+    todo = ((i, start, chunk) for i, start, chunk in iter_input_chunks(shards, text_field, chunk_size) if i not in done)
+
+    scored = 0
+    start_time = time.perf_counter()
+
+    def write(chunk_index, rows):
+        nonlocal scored
+        write_part(rows, part_path(output_dir, chunk_index, output_format), output_format)
+        scored += len(rows)
+        rate = scored / (time.perf_counter() - start_time)
+        print(f"chunk {chunk_index + 1}/{num_chunks}: {scored}/{remaining} texts, {rate:.1f} texts/s, "
+              f"ETA {format_seconds((remaining - scored) / rate)}", flush=True)
+
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers, initializer=init_worker, initargs=initargs) as pool:
+        # A bounded window of chunks in flight keeps memory flat however large the input is.
+        pending = deque()
+        for task in todo:
+            pending.append(pool.apply_async(score_chunk, task))
+            if len(pending) >= 2 * workers:
+                write(*pending.popleft().get())
+        while pending:
+            write(*pending.popleft().get())
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Scored {scored} texts in {format_seconds(elapsed)} ({scored / elapsed:.1f} texts/s) -> {output_dir}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Score large text collections and write predictions in part files')
+    parser.add_argument('inputs', nargs='+', help='JSONL/CSV/Parquet/TXT files, directories or globs')
+    parser.add_argument('--output', required=True, help='directory for part files and the resume checkpoint')
+    parser.add_argument('--models', nargs='+', choices=['distilbert', 'rnn'], default=['rnn'])
+    parser.add_argument('--text-field', default='text', help='text column for JSONL/CSV/Parquet inputs')
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='texts per part file and per worker task')
+    parser.add_argument('--workers', type=int, default=None, help='scoring processes (default: one per core)')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--quantized', action='store_true', help='score with dynamic int8 quantized models')
+    parser.add_argument('--runtime', choices=['eager', 'torchscript', 'onnx'], default='eager')
+    parser.add_argument('--distilbert-path', default='./destilbert-model')
+    parser.add_argument('--rnn-path', default='./rnn-model')
+    args = parser.parse_args()
+    if args.quantized and args.runtime != 'eager':
+        parser.error('--quantized only applies to the eager runtime')
+
+    score(args.inputs, args.output, args.models, args.text_field, args.format, args.chunk_size, args.workers,
+          args.batch_size, args.quantized, args.runtime, args.distilbert_path, args.rnn_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# serving.py - Local HTTP service around a warm-loaded CongressionalClassifier
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from micro_batching import MicroBatcher
+from prediction_cache import PredictionCache
+from inference import CongressionalClassifier, LatencyTracker
+
+class ClassifierRequestHandler(BaseHTTPRequestHandler):
+    classifier = None
+    batcher = None
+    request_latency = None
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json(200, {'status': 'ok', 'models': list(self.classifier.models)})
+        elif self.path == '/metrics':
+            metrics = self.classifier.metrics()
+            metrics['http_latency'] = self.request_latency.summary()
+            if self.batcher is not None:
+                metrics['micro_batching'] = self.batcher.stats()
+            self.send_json(200, metrics)
+        else:
+            self.send_json(404, {'error': f'unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self.send_json(404, {'error': f'unknown path {self.path}'})
+            return
+
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self.send_json(400, {'error': 'request body must be JSON'})
+            return
+
+        texts = payload.get('texts') if isinstance(payload, dict) else None
+        text = payload.get('text') if isinstance(payload, dict) else None
+        single = texts is None and isinstance(text, str)
+        if not single and not (isinstance(texts, list) and all(isinstance(item, str) for item in texts)):
+            self.send_json(400, {'error': 'expected a JSON object with a string "text" or a list of strings "texts"'})
+            return
+
+        try:
+            if single and self.batcher is not None:
+                results = [self.batcher.predict(text)]
+            else:
+                results = self.classifier.predict_batch([text] if single else texts)
+        except Exception as error:
+            self.send_json(500, {'error': f'prediction failed: {type(error).__name__}: {error}'})
+        else:
+            self.send_json(200, {'predictions': results})
+        finally:
+            self.request_latency.record(time.perf_counter() - start)
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(classifier, host='127.0.0.1', port=8000, batcher=None):
+    handler = type('BoundClassifierRequestHandler', (ClassifierRequestHandler,), {
+        'classifier': classifier,
+        'batcher': batcher,
+        'request_latency': LatencyTracker()
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+def serve(classifier, host='127.0.0.1', port=8000, batcher=None):
+    server = make_server(classifier, host, port, batcher)
+    print(f"Serving {', '.join(classifier.models)} on http://{host}:{port} "
+          f"(load times: {classifier.load_seconds})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve Congressional rhetoric classifiers over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--distilbert-path', default='./destilbert-model')
+    parser.add_argument('--rnn-path', default='./rnn-model')
+    parser.add_argument('--models', nargs='+', choices=['distilbert', 'rnn'], default=['distilbert', 'rnn'])
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--quantized', action='store_true', help='serve dynamic int8 quantized models')
+    parser.add_argument('--runtime', choices=['eager', 'torchscript', 'onnx'], default='eager',
+                        help='serve graphs written by export.py instead of eager PyTorch')
+    parser.add_argument('--cache-size', type=int, default=0, help='cache up to this many predictions per process')
+    parser.add_argument('--cache-ttl', type=float, default=None, help='seconds before a cached prediction expires')
+    parser.add_argument('--cache-path', default=None, help='SQLite file that persists cached predictions')
+    parser.add_argument('--cache-disk-size', type=int, default=None,
+                        help='rows kept in the SQLite file (default: --cache-size)')
+    parser.add_argument('--max-batch-latency-ms', type=float, default=None,
+                        help='micro-batch single-text requests, waiting at most this long to fill a batch')
+    args = parser.parse_args()
+    if args.quantized and args.runtime != 'eager':
+        parser.error('--quantized only applies to the eager runtime')
+
+    cache = None
+    if args.cache_size or args.cache_path:
+        cache = PredictionCache(args.cache_size or 100000, args.cache_ttl, args.cache_path, args.cache_disk_size)
+    classifier = CongressionalClassifier(
+        distilbert_path=args.distilbert_path,
+        rnn_path=args.rnn_path,
+        models=args.models,
+        batch_size=args.batch_size,
+        quantized=args.quantized,
+        runtime=args.runtime,
+        cache=cache
+    )
+    if args.max_batch_latency_ms is None:
+        serve(classifier, args.host, args.port)
+    else:
+        with MicroBatcher(classifier.predict_batch, args.batch_size, args.max_batch_latency_ms) as batcher:
+            serve(classifier, args.host, args.port, batcher)
+
+if __name__ == "__main__":
+    main()
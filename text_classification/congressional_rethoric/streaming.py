@@ -0,0 +1,132 @@
+# streaming.py - Streams (text, label) records from sharded JSONL / CSV / Parquet files
+import csv
+import glob
+import json
+import os
+import random
+from torch.utils.data import IterableDataset, get_worker_info
+
+SHARD_EXTENSIONS = ('.jsonl', '.csv', '.parquet')
+
+def resolve_shards(paths, extensions=SHARD_EXTENSIONS):
+    if isinstance(paths, str):
+        paths = [paths]
+    shards = []
+    for path in paths:
+        if os.path.isdir(path):
+            shards.extend(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith(extensions)
+            )
+        elif glob.has_magic(path):
+            shards.extend(glob.glob(path))
+        else:
+            shards.append(path)
+    if not shards:
+        raise ValueError(f'no {"/".join(extensions)} shards found in {paths}')
+    return sorted(shards)
+
+def read_jsonl(path, text_field, label_field):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record[text_field], record.get(label_field)
+
+def read_csv(path, text_field, label_field):
+    with open(path, encoding='utf-8', newline='') as f:
+        for record in csv.DictReader(f):
+            label = record.get(label_field)
+            yield record[text_field], int(label) if label not in (None, '') else None
+
+def read_txt(path, text_field=None, label_field=None):
+    # One unlabeled text per non-empty line.
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield line.rstrip('\n'), None
+
+def read_parquet(path, text_field, label_field, batch_size=8192):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise ImportError('reading Parquet shards requires pyarrow') from error
+
+    parquet_file = pq.ParquetFile(path)
+    columns = [text_field] + ([label_field] if label_field in parquet_file.schema_arrow.names else [])
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        texts = batch.column(text_field).to_pylist()
+        labels = batch.column(label_field).to_pylist() if len(columns) == 2 else [None] * len(texts)
+        yield from zip(texts, labels)
+
+READERS = {
+    '.jsonl': read_jsonl,
+    '.csv': read_csv,
+    '.parquet': read_parquet,
+    '.txt': read_txt
+}
+
+def iter_records(path, text_field='text', label_field='label'):
+    extension = os.path.splitext(path)[1]
+    if extension not in READERS:
+        raise ValueError(f'unsupported shard format {extension!r} for {path}')
+    return READERS[extension](path, text_field, label_field)
+
+def shuffle_buffer(records, buffer_size, rng):
+    buffer = []
+    for record in records:
+        if len(buffer) < buffer_size:
+            buffer.append(record)
+            continue
+        i = rng.randrange(buffer_size)
+        yield buffer[i]
+        buffer[i] = record
+    rng.shuffle(buffer)
+    yield from buffer
+
+class ShardedTextDataset(IterableDataset):
+    """Yields (text, label) from shards, split across DataLoader workers without duplicates."""
+
+    def __init__(self, paths, text_field='text', label_field='label', shuffle_buffer_size=0, seed=42,
+                 num_replicas=1, rank=0):
+        self.shards = resolve_shards(paths)
+        self.text_field = text_field
+        self.label_field = label_field
+        self.shuffle_buffer_size = shuffle_buffer_size
+        self.seed = seed
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __iter__(self):
+        worker = get_worker_info()
+        num_workers, worker_id = (worker.num_workers, worker.id) if worker else (1, 0)
+        num_parts = self.num_replicas * num_workers
+        part = self.rank * num_workers + worker_id
+
+        rng = random.Random(self.seed + self.epoch)
+        self.epoch += 1
+        shards = list(self.shards)
+        if self.shuffle_buffer_size:
+            rng.shuffle(shards)
+
+        # Whole shards per reader when there are enough of them; otherwise every reader scans all
+        # shards and keeps every num_parts-th record.
+        if len(shards) >= num_parts:
+            records = (record for shard in shards[part::num_parts]
+                       for record in iter_records(shard, self.text_field, self.label_field))
+        else:
+            records = (record for i, record in enumerate(
+                record for shard in shards for record in iter_records(shard, self.text_field, self.label_field)
+            ) if i % num_parts == part)
+
+        if self.shuffle_buffer_size:
+            records = shuffle_buffer(records, self.shuffle_buffer_size, random.Random(self.seed + self.epoch + part))
+        return records
+
+def iter_texts(paths, text_field='text'):
+    for shard in resolve_shards(paths):
+        for text, _ in iter_records(shard, text_field, label_field=None):
+            yield text
@@ -0,0 +1,204 @@
+# sweep.py - Parallel RNN hyperparameter sweep over one shared, pre-encoded copy of the corpus
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+import numpy as np
+from sklearn.model_selection import train_test_split
+from data import create_congressional_rhetoric_dataset
+from encoding import UNK_IDX, encode_texts
+
+SEARCH_SPACE = {
+    'max_vocab': [2000, 5000, 10000],
+    'embedding_dim': [32, 64, 100],
+    'lstm1_units': [32, 64],
+    'lstm2_units': [16, 32],
+    'dropout_rate': [0.1, 0.3, 0.5],
+    'lr': [0.001, 0.01, 0.1],
+    'batch_size': [32, 64]
+}
+
+def sample_trials(n_trials, seed=42):
+    rng = random.Random(seed)
+    trials, seen = [], set()
+    grid_size = np.prod([len(values) for values in SEARCH_SPACE.values()])
+    while len(trials) < min(n_trials, grid_size):
+        params = {name: rng.choice(values) for name, values in SEARCH_SPACE.items()}
+        key = tuple(params.values())
+        if key not in seen:
+            seen.add(key)
+            trials.append(params)
+    return trials
+
+def prepare_data(data_dir):
+    # Tokenized once with the uncapped vocabulary. Ids are frequency ranks, so a trial with
+    # max_vocab=k only has to map ids >= k to UNK to get exactly build_vocabulary(max_vocab=k).
+    from train_rnn import build_vocabulary
+
+    df = create_congressional_rhetoric_dataset()
+    X_train, X_test, y_train, y_test = train_test_split(
+        df['text'].values, df['label'].values,
+        test_size=0.2, random_state=42, stratify=df['label'].values
+    )
+    vocab, word_to_idx = build_vocabulary(X_train, max_vocab=None)
+    arrays = {
+        'train_ids': encode_texts(X_train, word_to_idx, dtype=np.int32),
+        'train_labels': np.asarray(y_train, dtype=np.int64),
+        'val_ids': encode_texts(X_test, word_to_idx, dtype=np.int32),
+        'val_labels': np.asarray(y_test, dtype=np.int64)
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(data_dir, f'{name}.npy'), array)
+    with open(os.path.join(data_dir, 'vocab.txt'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(vocab))
+    return vocab
+
+def load_data(data_dir):
+    # Read-only memory maps: every trial process shares the page cache instead of holding a copy.
+    return {name: np.load(os.path.join(data_dir, f'{name}.npy'), mmap_mode='r')
+            for name in ('train_ids', 'train_labels', 'val_ids', 'val_labels')}
+
+class MemmapSequences:
+    """Map-style dataset over memory-mapped id rows; a row is only copied out when a batch asks for it."""
+
+    def __init__(self, ids, labels):
+        self.ids = ids
+        self.labels = labels
+        self.lengths = np.count_nonzero(ids, axis=1)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, idx):
+        return self.ids[idx], self.labels[idx]
+
+def cap_vocabulary(ids, vocab_size):
+    return np.where(ids >= vocab_size, UNK_IDX, ids).astype(np.int64)
+
+class MedianPruner:
+    """Stops a trial whose accuracy at an epoch is below the median other trials reached at that epoch."""
+
+    def __init__(self, history, lock, warmup_epochs=5, min_trials=3):
+        self.history = history
+        self.lock = lock
+        self.warmup_epochs = warmup_epochs
+        self.min_trials = min_trials
+
+    def __call__(self, epoch, accuracy):
+        with self.lock:
+            previous = self.history.get(epoch, [])
+            self.history[epoch] = previous + [accuracy]
+        if epoch < self.warmup_epochs or len(previous) < self.min_trials:
+            return False
+        return accuracy < statistics.median(previous)
+
+def run_trial(trial_id, params, data_dir, output_dir, epochs, eval_interval, threads, history, lock, prune):
+    import torch
+    from torch.utils.data import DataLoader
+    from models import CongressionalRNN
+    from train_rnn import BucketBatchSampler, pad_collate, save_rnn_model, train_rnn_model
+
+    torch.set_num_threads(threads)
+    torch.manual_seed(42)
+    data = load_data(data_dir)
+    with open(os.path.join(data_dir, 'vocab.txt'), encoding='utf-8') as f:
+        vocab = f.read().split('\n')[:params['max_vocab']]
+
+    def collate(batch):
+        # The vocabulary cap is applied per batch, so the memory-mapped ids are never copied wholesale.
+        return pad_collate([(torch.from_numpy(cap_vocabulary(ids, len(vocab))), torch.tensor(int(label)))
+                            for ids, label in batch])
+
+    train_dataset = MemmapSequences(data['train_ids'], data['train_labels'])
+    val_dataset = MemmapSequences(data['val_ids'], data['val_labels'])
+    train_loader = DataLoader(train_dataset, collate_fn=collate,
+                              batch_sampler=BucketBatchSampler(train_dataset.lengths, params['batch_size']))
+    val_loader = DataLoader(val_dataset, batch_sampler=BucketBatchSampler(val_dataset.lengths, 128, shuffle=False),
+                            collate_fn=collate)
+
+    model = CongressionalRNN(len(vocab), params['embedding_dim'], params['lstm1_units'], params['lstm2_units'],
+                             params['dropout_rate'], pack_sequences=True)
+    evaluations = []
+    pruned = False
+    pruner = MedianPruner(history, lock) if prune else None
+
+    def on_evaluate(epoch, accuracy):
+        nonlocal pruned
+        evaluations.append((epoch, accuracy))
+        pruned = pruner is not None and pruner(epoch, accuracy)
+        return pruned
+
+    start = time.perf_counter()
+    model, best_accuracy = train_rnn_model(model, train_loader, val_loader, epochs=epochs, eval_interval=eval_interval,
+                                           lr=params['lr'], on_evaluate=on_evaluate)
+    train_seconds = time.perf_counter() - start
+
+    result = {
+        'trial': trial_id,
+        'params': params,
+        'config': dict(model.config),
+        'parameters': sum(p.numel() for p in model.parameters()),
+        'best_val_accuracy': best_accuracy,
+        'epochs_run': evaluations[-1][0],
+        'pruned': pruned,
+        'train_seconds': train_seconds,
+        'history': evaluations
+    }
+    if not pruned:
+        trial_dir = os.path.join(output_dir, f'trial-{trial_id:03d}')
+        save_rnn_model(model, vocab, {word: idx for idx, word in enumerate(vocab)}, trial_dir)
+        result['model_path'] = trial_dir
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Random-search CongressionalRNN hyperparameters in parallel')
+    parser.add_argument('--trials', type=int, default=20)
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--eval-interval', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None, help='trials run at once (default: one per core)')
+    parser.add_argument('--no-prune', action='store_true', help='run every trial for all epochs')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='./rnn-sweep', help='results.jsonl and one model directory per trial')
+    args = parser.parse_args()
+
+    trials = sample_trials(args.trials, args.seed)
+    workers = min(args.workers or os.cpu_count() or 1, len(trials))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    os.makedirs(args.output, exist_ok=True)
+    results_path = os.path.join(args.output, 'results.jsonl')
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        vocab = prepare_data(data_dir)
+        print(f"Encoded corpus once ({len(vocab)} words); running {len(trials)} trials on {workers} processes")
+
+        context = multiprocessing.get_context('spawn')
+        with context.Manager() as manager, context.Pool(workers) as pool, open(results_path, 'a') as f:
+            history, lock = manager.dict(), manager.Lock()
+            pending = [
+                pool.apply_async(run_trial, (trial_id, params, data_dir, args.output, args.epochs, args.eval_interval,
+                                             threads, history, lock, not args.no_prune))
+                for trial_id, params in enumerate(trials)
+            ]
+            results = []
+            for task in pending:
+                result = task.get()
+                results.append(result)
+                f.write(json.dumps(result) + '\n')
+                f.flush()
+                print(f"trial {result['trial']:>3}: acc {result['best_val_accuracy']:.4f}, "
+                      f"{result['parameters']:>9,} params, {result['train_seconds']:7.1f} s"
+                      f"{', pruned at epoch ' + str(result['epochs_run']) if result['pruned'] else ''}")
+
+    print("Best completed trials:")
+    finished = sorted((r for r in results if not r['pruned']), key=lambda r: (-r['best_val_accuracy'], r['parameters']))
+    for result in finished[:5]:
+        print(f"  {result['best_val_accuracy']:.4f}  {result['parameters']:>9,} params  {result['params']}  "
+              f"-> {result['model_path']}")
+    print(f"Per-trial results appended to {results_path}")
+
+if __name__ == "__main__":
+    main()
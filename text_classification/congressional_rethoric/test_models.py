@@ -1,65 +1,39 @@
+import time
 import torch
 import torch.nn as nn
-from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
+from functools import partial
 from sklearn.metrics import accuracy_score
 from sklearn.model_selection import train_test_split
-import pickle
 from data import create_congressional_rhetoric_dataset
-from models import CongressionalRNN
+from inference import CongressionalClassifier, batched_inference, distilbert_logits, load_distilbert, load_rnn, rnn_logits
 
-def load_distilbert(model_path='./destilbert-model'):
-    model = DistilBertForSequenceClassification.from_pretrained(model_path)
-    tokenizer = DistilBertTokenizer.from_pretrained(model_path)
-    return model, tokenizer
+def timed_predictions(name, texts, batch_fn, batch_size):
+    start = time.perf_counter()
+    outputs = batched_inference(texts, batch_fn, batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"{name} throughput: {len(texts) / elapsed:.1f} texts/sec ({len(texts)} texts, batch size {batch_size})")
+    return torch.argmax(outputs, dim=1).numpy()
 
-def load_rnn(model_path='./rnn-model'):
-    with open(f'{model_path}/config.pkl', 'rb') as f:
-        config = pickle.load(f)
-    with open(f'{model_path}/vocab.pkl', 'rb') as f:
-        vocab_data = pickle.load(f)
-    
-    model = CongressionalRNN(**config)
-    model.load_state_dict(torch.load(f'{model_path}/model.pth'))
-    model.eval()
-    
-    return model, vocab_data['word_to_idx']
-
-def text_to_sequence(text, word_to_idx, max_length=256):
-    words = text.lower().split()
-    seq = [word_to_idx.get(word, 1) for word in words]
-    
-    if len(seq) > max_length:
-        seq = seq[:max_length]
-    else:
-        seq.extend([0] * (max_length - len(seq)))
-    
-    return torch.LongTensor(seq).unsqueeze(0)
-
-def evaluate_models():
+def evaluation_split():
     df = create_congressional_rhetoric_dataset()
     _, X_test, _, y_test = train_test_split(
         df['text'].values, df['label'].values,
         test_size=0.2, random_state=42, stratify=df['label'].values
     )
+    return [str(text) for text in X_test], y_test
+
+def evaluate_models(batch_size=32, quantized=False):
+    X_test, y_test = evaluation_split()
     
-    distilbert_model, distilbert_tokenizer = load_distilbert()
-    rnn_model, rnn_word_to_idx = load_rnn()
-    
-    distilbert_predictions = []
-    for text in X_test:
-        inputs = distilbert_tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
-        with torch.no_grad():
-            outputs = distilbert_model(**inputs)
-            pred = torch.argmax(outputs.logits, dim=1).item()
-        distilbert_predictions.append(pred)
+    distilbert_model, distilbert_tokenizer = load_distilbert(quantized=quantized)
+    rnn_model, rnn_word_to_idx = load_rnn(quantized=quantized)
     
-    rnn_predictions = []
-    for text in X_test:
-        sequence = text_to_sequence(text, rnn_word_to_idx)
-        with torch.no_grad():
-            outputs = rnn_model(sequence)
-            pred = torch.argmax(outputs, dim=1).item()
-        rnn_predictions.append(pred)
+    distilbert_predictions = timed_predictions(
+        'DistilBERT', X_test, partial(distilbert_logits, distilbert_model, distilbert_tokenizer), batch_size
+    )
+    rnn_predictions = timed_predictions(
+        'RNN', X_test, partial(rnn_logits, rnn_model, rnn_word_to_idx), batch_size
+    )
     
     distilbert_accuracy = accuracy_score(y_test, distilbert_predictions)
     rnn_accuracy = accuracy_score(y_test, rnn_predictions)
@@ -70,26 +44,21 @@ def evaluate_models():
     
     return distilbert_accuracy, rnn_accuracy
 
-def predict(text, label):
-    distilbert_model, distilbert_tokenizer = load_distilbert()
-    rnn_model, rnn_word_to_idx = load_rnn()
+_default_classifier = None
 
-    inputs = distilbert_tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = distilbert_model(**inputs)
-        distilbert_logits = outputs.logits
-        distilbert_pred = torch.argmax(distilbert_logits, dim=1).item()
-        distilbert_confidence = torch.softmax(distilbert_logits, dim=1).max().item()
+def get_classifier():
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = CongressionalClassifier()
+    return _default_classifier
 
-    sequence = text_to_sequence(text, rnn_word_to_idx)
-    with torch.no_grad():
-        rnn_outputs = rnn_model(sequence)
-        rnn_pred = torch.argmax(rnn_outputs, dim=1).item()
-        rnn_confidence = torch.softmax(rnn_outputs, dim=1).max().item()
+def predict(text, label, classifier=None):
+    classifier = classifier or get_classifier()
+    result = classifier.predict(text)
     print(f"Text: {text}")
     print(f"True Label: {label}")
-    print(f"DistilBERT Prediction: {distilbert_pred} (Confidence: {distilbert_confidence:.4f})")
-    print(f"RNN Prediction: {rnn_pred} (Confidence: {rnn_confidence:.4f})")
+    print(f"DistilBERT Prediction: {result['distilbert']['label']} (Confidence: {result['distilbert']['confidence']:.4f})")
+    print(f"RNN Prediction: {result['rnn']['label']} (Confidence: {result['rnn']['confidence']:.4f})")
 
 examples = [
     {"text": "Mr. Speaker, this bipartisan infrastructure legislation will create thousands of good-paying American jobs while modernizing our roads and bridges.", "label": 1},
@@ -102,4 +71,5 @@ examples = [
 if __name__ == "__main__":
     evaluate_models()
     for example in examples:
-        predict(example["text"], example["label"])
\ No newline at end of file
+        predict(example["text"], example["label"])
+    print(f"Classifier metrics: {get_classifier().metrics()}")
\ No newline at end of file
@@ -0,0 +1,47 @@
+# test_serving.py - /predict request handling against a classifier with a stub RNN batch function
+import json
+import threading
+import urllib.error
+import urllib.request
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('transformers')
+
+from inference import CongressionalClassifier
+from serving import make_server
+
+def stub_logits(texts):
+    return torch.tensor([[0.0, 0.0, float(len(text))] for text in texts])
+
+@pytest.fixture
+def url():
+    classifier = CongressionalClassifier(models=())
+    classifier.models = ('rnn',)
+    classifier.batch_fns['rnn'] = stub_logits
+    server = make_server(classifier, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/predict'
+    server.shutdown()
+    server.server_close()
+
+def post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+def test_empty_texts_return_no_predictions(url):
+    assert post(url, {'texts': []}) == (200, {'predictions': []})
+
+def test_texts_are_scored_in_order(url):
+    status, body = post(url, {'texts': ['a longer text', 'short']})
+    assert status == 200
+    assert [prediction['rnn']['label'] for prediction in body['predictions']] == [2, 2]
+
+def test_invalid_payload_is_rejected(url):
+    assert post(url, {'texts': 'not a list'})[0] == 400
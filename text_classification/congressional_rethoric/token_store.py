@@ -0,0 +1,230 @@
+# token_store.py - Memory-mapped token-id corpus: flat ids + offsets index + labels
+import argparse
+import json
+import os
+from itertools import islice
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+from encoding import encode_chunk
+
+FORMAT_VERSION = 1
+VOCAB_FILE = 'vocab.txt'
+
+def _memmap(path, dtype, count):
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+class TokenStore:
+    """Read-only view of a token store; every sequence is a zero-copy slice of tokens.bin."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.dtype = np.dtype(self.meta['dtype'])
+        num_sequences = self.meta['num_sequences']
+        self.tokens = _memmap(os.path.join(path, 'tokens.bin'), self.dtype, self.meta['num_tokens'])
+        self.offsets = _memmap(os.path.join(path, 'offsets.bin'), np.int64, num_sequences + 1)
+        self.labels = _memmap(os.path.join(path, 'labels.bin'), np.int64, num_sequences)
+        if num_sequences == 0:
+            self.offsets = np.zeros(1, dtype=np.int64)
+
+    def __getstate__(self):
+        # Worker processes reopen the mapping instead of receiving a pickled copy of the arrays.
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, idx):
+        return self.tokens[self.offsets[idx]:self.offsets[idx + 1]]
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def vocabulary(self):
+        path = os.path.join(self.path, VOCAB_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'{self.path} has no {VOCAB_FILE}; it was not built with `token_store.py rnn`')
+        with open(path, encoding='utf-8') as f:
+            return f.read().split('\n')
+
+class TokenStoreWriter:
+    """Appends sequences to a new or existing token store; meta.json is rewritten on flush."""
+
+    def __init__(self, path, dtype='int32'):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self.dtype = np.dtype(meta['dtype'])
+            self.num_sequences = meta['num_sequences']
+            self.num_tokens = meta['num_tokens']
+        else:
+            self.dtype = np.dtype(dtype)
+            self.num_sequences = 0
+            self.num_tokens = 0
+
+        self.tokens_file = open(os.path.join(path, 'tokens.bin'), 'ab')
+        self.offsets_file = open(os.path.join(path, 'offsets.bin'), 'ab')
+        self.labels_file = open(os.path.join(path, 'labels.bin'), 'ab')
+        # Bytes written after the last flush are not covered by meta.json; drop them so new rows
+        # land exactly where the recorded offsets say they are.
+        self.tokens_file.truncate(self.num_tokens * self.dtype.itemsize)
+        self.labels_file.truncate(self.num_sequences * 8)
+        self.offsets_file.truncate((self.num_sequences + 1) * 8 if self.num_sequences else 0)
+        if not self.num_sequences:
+            self.offsets_file.write(np.zeros(1, dtype=np.int64).tobytes())
+
+    def append(self, sequences, labels):
+        lengths = np.fromiter((len(seq) for seq in sequences), dtype=np.int64, count=len(sequences))
+        flat = np.concatenate([np.asarray(seq, dtype=self.dtype) for seq in sequences]) if len(sequences) else []
+        self._write(np.asarray(flat, dtype=self.dtype), lengths, labels)
+
+    def append_padded(self, ids, lengths, labels):
+        # Takes encode_chunk output directly: the real tokens are the leading `length` entries of each row.
+        mask = np.arange(ids.shape[1]) < lengths[:, None]
+        self._write(ids[mask].astype(self.dtype, copy=False), np.asarray(lengths, dtype=np.int64), labels)
+
+    def _write(self, flat, lengths, labels):
+        labels = np.asarray(labels, dtype=np.int64)
+        if len(labels) != len(lengths):
+            raise ValueError(f'got {len(lengths)} sequences but {len(labels)} labels')
+        offsets = self.num_tokens + np.cumsum(lengths)
+        self.tokens_file.write(flat.tobytes())
+        self.labels_file.write(labels.tobytes())
+        self.offsets_file.write(offsets.astype(np.int64).tobytes())
+        self.num_tokens = int(offsets[-1]) if len(offsets) else self.num_tokens
+        self.num_sequences += len(lengths)
+
+    def flush(self):
+        for f in (self.tokens_file, self.labels_file, self.offsets_file):
+            f.flush()
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'dtype': self.dtype.name,
+            'num_sequences': self.num_sequences,
+            'num_tokens': self.num_tokens
+        }
+        tmp_path = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, 'meta.json'))
+
+    def close(self):
+        self.flush()
+        for f in (self.tokens_file, self.labels_file, self.offsets_file):
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _chunks(records, chunk_size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        texts, labels = zip(*chunk)
+        yield list(texts), list(labels)
+
+def build_rnn_token_store(records, word_to_idx, path, max_length=256, chunk_size=65536):
+    with TokenStoreWriter(path) as writer:
+        for texts, labels in _chunks(records, chunk_size):
+            ids, lengths = encode_chunk(texts, word_to_idx, max_length)
+            writer.append_padded(ids, lengths, labels)
+    return TokenStore(path)
+
+def build_distilbert_token_store(records, tokenizer, path, max_length=512, chunk_size=4096):
+    with TokenStoreWriter(path) as writer:
+        for texts, labels in _chunks(records, chunk_size):
+            encodings = tokenizer([str(text) for text in texts], truncation=True, max_length=max_length)
+            writer.append(encodings['input_ids'], labels)
+    return TokenStore(path)
+
+class TokenStoreRNNDataset(Dataset):
+    """Items are views into the memory map; token_store_collate widens them to int64 once per batch."""
+
+    def __init__(self, store, indices=None, max_length=256):
+        self.store = store
+        self.indices = np.arange(len(store)) if indices is None else np.asarray(indices)
+        self.max_length = max_length
+        self.lengths = np.minimum(store.lengths()[self.indices], max_length)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, idx):
+        idx = self.indices[idx]
+        return self.store[idx][:self.max_length], int(self.store.labels[idx])
+
+def token_store_collate(batch):
+    sequences, labels = zip(*batch)
+    ids = np.zeros((len(sequences), max(max(len(seq) for seq in sequences), 1)), dtype=np.int64)
+    for row, seq in enumerate(sequences):
+        ids[row, :len(seq)] = seq
+    return torch.from_numpy(ids), torch.tensor(labels, dtype=torch.long)
+
+class TokenStoreDistilBertDataset(Dataset):
+    def __init__(self, store, indices=None):
+        self.store = store
+        self.indices = np.arange(len(store)) if indices is None else np.asarray(indices)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, idx):
+        idx = self.indices[idx]
+        input_ids = self.store[idx].tolist()
+        return {
+            'input_ids': input_ids,
+            'attention_mask': [1] * len(input_ids),
+            'labels': int(self.store.labels[idx])
+        }
+
+def write_vocabulary(path, vocab):
+    # The RNN needs the word list its ids came from; an existing store must keep the same one.
+    vocab_path = os.path.join(path, VOCAB_FILE)
+    if os.path.exists(vocab_path):
+        with open(vocab_path, encoding='utf-8') as f:
+            if f.read().split('\n') != list(vocab):
+                raise ValueError(f'{path} was built with a different vocabulary')
+        return
+    os.makedirs(path, exist_ok=True)
+    with open(vocab_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(vocab))
+
+def main():
+    from data import create_congressional_rhetoric_dataset
+
+    parser = argparse.ArgumentParser(description='Write the Congressional rhetoric corpus to a memory-mapped token store')
+    parser.add_argument('model', choices=['rnn', 'distilbert'])
+    parser.add_argument('model_path', help='trained model directory providing the vocabulary / tokenizer')
+    parser.add_argument('output', help='token store directory (appended to if it exists)')
+    args = parser.parse_args()
+
+    df = create_congressional_rhetoric_dataset()
+    records = zip(df['text'].values, df['label'].values)
+    if args.model == 'rnn':
+        from inference import load_rnn
+        _, word_to_idx = load_rnn(args.model_path)
+        write_vocabulary(args.output, list(word_to_idx))
+        store = build_rnn_token_store(records, word_to_idx, args.output)
+    else:
+        from transformers import DistilBertTokenizer
+        tokenizer = DistilBertTokenizer.from_pretrained(args.model_path)
+        store = build_distilbert_token_store(records, tokenizer, args.output)
+    print(f"Token store at {args.output}: {len(store)} sequences, {store.meta['num_tokens']} tokens")
+
+if __name__ == "__main__":
+    main()
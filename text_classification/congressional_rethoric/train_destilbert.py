@@ -1,8 +1,13 @@
 import  pandas as pd
 import numpy as np
 import warnings
-from transformers import TrainingArguments, Trainer
+import argparse
+import hashlib
+import os
+from transformers import TrainingArguments, Trainer, DataCollatorWithPadding
 from data import create_congressional_rhetoric_dataset
+from streaming import ShardedTextDataset
+from token_store import TokenStore, TokenStoreDistilBertDataset
 import torch
 from torch.utils.data import Dataset
 from sklearn.model_selection import train_test_split
@@ -16,65 +21,148 @@ label_dict = {
     2: "negative"
 }
 
-df = create_congressional_rhetoric_dataset()
-
 model_checkpoint = "distilbert-base-uncased"
-model = DistilBertForSequenceClassification.from_pretrained(
-        model_checkpoint, 
-        num_labels=3
-    )
-tokenizer = DistilBertTokenizer.from_pretrained(model_checkpoint)
+
+def tokenizer_fingerprint(tokenizer):
+    digest = hashlib.sha256(f'{type(tokenizer).__name__}:{tokenizer.name_or_path}'.encode('utf-8'))
+    for token, idx in sorted(tokenizer.get_vocab().items(), key=lambda item: item[1]):
+        digest.update(f'{idx}:{token}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+def encoding_cache_path(texts, tokenizer, max_length, cache_dir):
+    digest = hashlib.sha256(f'{tokenizer_fingerprint(tokenizer)}:{max_length}'.encode('utf-8'))
+    for text in texts:
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\0')
+    return os.path.join(cache_dir, f'{digest.hexdigest()}.npz')
+
+def tokenize_texts(texts, tokenizer, max_length=512, cache_dir='./token-cache'):
+    # Token ids are stored flat with row offsets, so the cache loads without unpickling Python lists.
+    path = encoding_cache_path(texts, tokenizer, max_length, cache_dir) if cache_dir else None
+    if path and os.path.exists(path):
+        cached = np.load(path)
+        return cached['ids'], cached['offsets']
+
+    encodings = tokenizer([str(text) for text in texts], truncation=True, max_length=max_length)
+    lengths = [len(ids) for ids in encodings['input_ids']]
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    ids = np.fromiter((token for ids in encodings['input_ids'] for token in ids), dtype=np.int32, count=int(offsets[-1]))
+
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(path, ids=ids, offsets=offsets)
+    return ids, offsets
 
 class CongressionalDistilBertDataset(Dataset):
-    def __init__(self, texts, labels, tokenizer):
-        self.texts = texts
+    def __init__(self, texts, labels, tokenizer, max_length=512, cache_dir='./token-cache'):
+        self.ids, self.offsets = tokenize_texts(texts, tokenizer, max_length, cache_dir)
         self.labels = labels
-        self.tokenizer = tokenizer
     
     def __len__(self):
-        return len(self.texts)
+        return len(self.labels)
     
     def __getitem__(self, idx):
+        input_ids = self.ids[self.offsets[idx]:self.offsets[idx + 1]].tolist()
+        return {
+            'input_ids': input_ids,
+            'attention_mask': [1] * len(input_ids),
+            'labels': int(self.labels[idx])
+        }
+
+class StreamingTextCollator:
+    """Tokenizes streamed (text, label) records per batch, padded to the batch's longest member."""
+    
+    def __init__(self, tokenizer, max_length=512):
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+    
+    def __call__(self, batch):
+        texts, labels = zip(*batch)
         encoding = self.tokenizer(
-            str(self.texts[idx]),
+            [str(text) for text in texts],
             truncation=True,
-            padding='max_length',
-            max_length=512,
+            padding=True,
+            max_length=self.max_length,
             return_tensors='pt'
         )
-        return {
-            'input_ids': encoding['input_ids'].flatten(),
-            'attention_mask': encoding['attention_mask'].flatten(),
-            'labels': torch.tensor(self.labels[idx], dtype=torch.long)
-        }
-
-X_train, X_val, y_train, y_val = train_test_split(
-        df['text'].values, df['label'].values, 
-        test_size=0.2, random_state=42
-    )
-
-train_dataset = CongressionalDistilBertDataset(X_train, y_train, tokenizer)
-val_dataset = CongressionalDistilBertDataset(X_val, y_val, tokenizer)
+        encoding['labels'] = torch.tensor(labels, dtype=torch.long)
+        return encoding
 
-
-training_args = TrainingArguments(
-        output_dir='./results',
-        num_train_epochs=3,
-        per_device_train_batch_size=8,
-        per_device_eval_batch_size=8,
-        logging_steps=10,
-    )
+def main():
+    parser = argparse.ArgumentParser(description='Fine-tune DistilBERT for Congressional rhetoric classification')
+    parser.add_argument('--train-shards', nargs='+', help='JSONL/CSV/Parquet files, directories or globs to stream training data from')
+    parser.add_argument('--val-shards', nargs='+')
+    parser.add_argument('--token-store', help='train on a store written by `token_store.py distilbert` (the full corpus; '
+                                              'it is split 80/20 like the in-memory dataset)')
+    parser.add_argument('--shuffle-buffer', type=int, default=10000)
+    parser.add_argument('--max-steps', type=int, default=-1, help='required when streaming: the stream has no length')
+    parser.add_argument('--num-workers', type=int, default=0, help='DataLoader worker processes')
+    parser.add_argument('--prefetch-factor', type=int, default=2, help='batches prefetched per worker')
+    parser.add_argument('--no-persistent-workers', action='store_true', help='restart workers every epoch')
+    parser.add_argument('--pin-memory', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
     
-trainer = Trainer(
-        model=model,
-        args=training_args,
-        train_dataset=train_dataset,
-        eval_dataset=val_dataset
-    )
-print("Training...")
-trainer.train()
-
-model.save_pretrained('./destilbert-model')
-tokenizer.save_pretrained('./destilbert-model')
+    model = DistilBertForSequenceClassification.from_pretrained(
+            model_checkpoint, 
+            num_labels=3
+        )
+    tokenizer = DistilBertTokenizer.from_pretrained(model_checkpoint)
+    
+    if args.token_store:
+        if args.train_shards:
+            parser.error('--token-store cannot be combined with --train-shards')
+        store = TokenStore(args.token_store)
+        train_index, val_index = train_test_split(np.arange(len(store)), test_size=0.2, random_state=42)
+        train_dataset = TokenStoreDistilBertDataset(store, train_index)
+        val_dataset = TokenStoreDistilBertDataset(store, val_index)
+        data_collator = DataCollatorWithPadding(tokenizer)
+    elif args.train_shards:
+        if args.max_steps <= 0:
+            parser.error('--max-steps is required when streaming from --train-shards')
+        train_dataset = ShardedTextDataset(args.train_shards, shuffle_buffer_size=args.shuffle_buffer)
+        val_dataset = ShardedTextDataset(args.val_shards) if args.val_shards else None
+        data_collator = StreamingTextCollator(tokenizer)
+    else:
+        df = create_congressional_rhetoric_dataset()
+        X_train, X_val, y_train, y_val = train_test_split(
+                df['text'].values, df['label'].values, 
+                test_size=0.2, random_state=42
+            )
+        train_dataset = CongressionalDistilBertDataset(X_train, y_train, tokenizer)
+        val_dataset = CongressionalDistilBertDataset(X_val, y_val, tokenizer)
+        data_collator = DataCollatorWithPadding(tokenizer)
+    
+    training_args = TrainingArguments(
+            output_dir='./results',
+            num_train_epochs=3,
+            max_steps=args.max_steps,
+            per_device_train_batch_size=8,
+            per_device_eval_batch_size=8,
+            logging_steps=10,
+            group_by_length=not args.train_shards,
+            dataloader_num_workers=args.num_workers,
+            dataloader_prefetch_factor=args.prefetch_factor if args.num_workers > 0 else None,
+            dataloader_persistent_workers=args.num_workers > 0 and not args.no_persistent_workers,
+            dataloader_pin_memory=args.pin_memory,
+            seed=args.seed,
+        )
+        
+    trainer = Trainer(
+            model=model,
+            args=training_args,
+            train_dataset=train_dataset,
+            eval_dataset=val_dataset,
+            data_collator=data_collator
+        )
+    print("Training...")
+    trainer.train()
+    
+    model.save_pretrained('./destilbert-model')
+    tokenizer.save_pretrained('./destilbert-model')
+    
+    print("Done! Model saved to './destilbert-model'")
 
-print("Done! Model saved to './destilbert-model'")
+if __name__ == "__main__":
+    main()
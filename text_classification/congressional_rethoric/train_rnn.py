@@ -1,156 +1,575 @@
 # train_rnn.py - Essential RNN training script
 import numpy as np
 import torch
+import torch.distributed as dist
 import torch.nn as nn
-from torch.utils.data import Dataset, DataLoader
+from torch.nn.parallel import DistributedDataParallel
+from torch.nn.utils.rnn import pad_sequence
+from torch.utils.data import Dataset, DataLoader, Sampler
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, confusion_matrix
-from collections import Counter
-import pickle
+from collections import Counter, deque
+from contextlib import nullcontext
+from itertools import islice
+import argparse
+import hashlib
+import multiprocessing
 import os
+import random
+import time
+import torch.nn.functional as F
+import instrumentation
+from artifacts import directory_fingerprint, save_rnn_artifact
 from data import create_congressional_rhetoric_dataset
+from encoding import encode_chunk, encode_texts, tokenize
 from models import CongressionalRNN
+from streaming import ShardedTextDataset, iter_texts
+from token_store import TokenStore, TokenStoreRNNDataset, token_store_collate
 
 
 torch.manual_seed(42)
 np.random.seed(42)
 
-def build_vocabulary(texts, max_vocab=10000):
-    words = []
+def count_tokens(texts):
+    counts = Counter()
     for text in texts:
-        words.extend(text.lower().split())
+        counts.update(tokenize(text))
+    return counts
+
+def iter_chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def build_vocabulary(texts, max_vocab=10000, min_freq=1, num_workers=1, chunk_size=10000):
+    # Chunk counts are merged in input order, so words keep their first-occurrence order and
+    # most_common() breaks ties exactly as a single pass over the corpus would.
+    word_counts = Counter()
+    if num_workers > 1:
+        with multiprocessing.Pool(num_workers) as pool:
+            pending = deque()
+            for chunk in iter_chunks(texts, chunk_size):
+                pending.append(pool.apply_async(count_tokens, (chunk,)))
+                if len(pending) >= 2 * num_workers:
+                    word_counts.update(pending.popleft().get())
+            while pending:
+                word_counts.update(pending.popleft().get())
+    else:
+        for chunk in iter_chunks(texts, chunk_size):
+            word_counts.update(count_tokens(chunk))
     
-    word_counts = Counter(words)
-    vocab = ['<PAD>', '<UNK>'] + [word for word, _ in word_counts.most_common(max_vocab-2)]
+    # max_vocab=None keeps every word, ranked by frequency, so truncating later equals a smaller max_vocab.
+    vocab = ['<PAD>', '<UNK>'] + [
+        word for word, count in word_counts.most_common(None if max_vocab is None else max_vocab-2)
+        if count >= min_freq
+    ]
     word_to_idx = {word: idx for idx, word in enumerate(vocab)}
     
     return vocab, word_to_idx
 
 def texts_to_sequences(texts, word_to_idx, max_length=256):
-    sequences = []
-    for text in texts:
-        words = text.lower().split()
-        seq = [word_to_idx.get(word, 1) for word in words]
-        
-        if len(seq) > max_length:
-            seq = seq[:max_length]
-        else:
-            seq.extend([0] * (max_length - len(seq)))
-        
-        sequences.append(seq)
-    
-    return np.array(sequences)
+    return encode_texts(texts, word_to_idx, max_length)
 
 class CongressionalRNNDataset(Dataset):
-    def __init__(self, sequences, labels):
+    def __init__(self, sequences, labels, teacher_logits=None):
         self.sequences = torch.LongTensor(sequences)
         self.labels = torch.LongTensor(labels)
+        self.lengths = (self.sequences != 0).sum(dim=1)
+        self.teacher_logits = torch.as_tensor(teacher_logits, dtype=torch.float32) if teacher_logits is not None else None
     
     def __len__(self):
         return len(self.sequences)
     
     def __getitem__(self, idx):
+        if self.teacher_logits is not None:
+            return self.sequences[idx], self.labels[idx], self.teacher_logits[idx]
         return self.sequences[idx], self.labels[idx]
 
-def train_rnn_model(model, train_loader, val_loader, epochs=50):
-    criterion = nn.CrossEntropyLoss()
-    optimizer = torch.optim.Adam(model.parameters(), lr=0.1)
+class BucketBatchSampler(Sampler):
+    """Batches examples of similar length: shuffles, sorts within pools of batch_size * bucket_size, shuffles batches.
+    
+    With num_replicas > 1 every rank builds the same batch list from the shared seed and keeps every
+    num_replicas-th batch, so ranks never see the same example twice in an epoch.
+    """
+    
+    def __init__(self, lengths, batch_size, shuffle=True, seed=42, bucket_size=100, drop_last=False,
+                 num_replicas=1, rank=0):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.bucket_size = bucket_size
+        self.drop_last = drop_last
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.epoch = 0
+    
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+    
+    def __iter__(self):
+        rng = np.random.default_rng(self.seed + self.epoch)
+        self.epoch += 1
+        
+        indices = rng.permutation(len(self.lengths)) if self.shuffle else np.arange(len(self.lengths))
+        pool_size = self.batch_size * self.bucket_size
+        batches = []
+        for start in range(0, len(indices), pool_size):
+            pool = indices[start:start + pool_size]
+            pool = pool[np.argsort(self.lengths[pool], kind='stable')]
+            batches.extend(pool[i:i + self.batch_size] for i in range(0, len(pool), self.batch_size))
+        
+        if self.drop_last:
+            batches = [batch for batch in batches if len(batch) == self.batch_size]
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        for batch in batches[self.rank::self.num_replicas]:
+            yield batch.tolist()
+    
+    def __len__(self):
+        if self.drop_last:
+            num_batches = len(self.lengths) // self.batch_size
+        else:
+            num_batches = (len(self.lengths) + self.batch_size - 1) // self.batch_size
+        return len(range(self.rank, num_batches, self.num_replicas))
+
+def pad_collate(batch):
+    # Pads (or trims) each batch to its own longest sequence; only valid for pack_sequences models.
+    sequences, labels, *targets = zip(*batch)
+    sequences = pad_sequence(sequences, batch_first=True, padding_value=0)
+    max_length = max(int(sequences.ne(0).sum(dim=1).max()), 1) if sequences.size(1) else 1
+    padded = torch.zeros(len(sequences), max_length, dtype=torch.long)
+    width = min(max_length, sequences.size(1))
+    padded[:, :width] = sequences[:, :width]
+    return (padded, torch.stack(labels), *[torch.stack(target) for target in targets])
+
+class TextBatchCollator:
+    """Encodes raw (text, label) records one batch at a time, padded to the batch's longest text."""
+    
+    def __init__(self, word_to_idx, max_length=256):
+        self.word_to_idx = word_to_idx
+        self.max_length = max_length
+    
+    def __call__(self, batch):
+        texts, labels = zip(*batch)
+        ids, lengths = encode_chunk(texts, self.word_to_idx, self.max_length)
+        ids = ids[:, :max(int(lengths.max()), 1)]
+        return torch.from_numpy(np.ascontiguousarray(ids)), torch.LongTensor(labels)
+
+def init_distributed():
+    # torchrun exports RANK / WORLD_SIZE / MASTER_ADDR; a plain `python train_rnn.py` stays single-process.
+    world_size = int(os.environ.get('WORLD_SIZE', 1))
+    if world_size == 1:
+        return 1, 0
+    dist.init_process_group('gloo')
+    return world_size, dist.get_rank()
+
+def is_main_process():
+    return not dist.is_initialized() or dist.get_rank() == 0
+
+def seed_worker(worker_id):
+    # DataLoader seeds each worker's torch RNG from its generator; numpy and random follow from it.
+    worker_seed = torch.initial_seed() % 2**32
+    np.random.seed(worker_seed)
+    random.seed(worker_seed)
+
+def loader_kwargs(num_workers=0, prefetch_factor=2, persistent_workers=True, pin_memory=False, seed=42):
+    generator = torch.Generator()
+    generator.manual_seed(seed)
+    kwargs = {
+        'num_workers': num_workers,
+        'pin_memory': pin_memory,
+        'worker_init_fn': seed_worker,
+        'generator': generator
+    }
+    if num_workers > 0:
+        kwargs['prefetch_factor'] = prefetch_factor
+        kwargs['persistent_workers'] = persistent_workers
+    return kwargs
+
+def set_loader_epoch(loader, epoch):
+    for source in (loader.dataset, loader.batch_sampler, loader.sampler):
+        if hasattr(source, 'set_epoch'):
+            source.set_epoch(epoch)
+
+def teacher_cache_path(texts, teacher_path, cache_dir):
+    digest = hashlib.sha256(directory_fingerprint(teacher_path).encode('utf-8'))
+    for text in texts:
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\0')
+    return os.path.join(cache_dir, f'{digest.hexdigest()}.npy')
+
+def compute_teacher_logits(texts, teacher_path='./destilbert-model', cache_dir='./teacher-cache', batch_size=32):
+    # Keyed by the teacher's files and the texts, so a retrained teacher or a new split recomputes.
+    path = teacher_cache_path(texts, teacher_path, cache_dir)
+    if os.path.exists(path):
+        return np.load(path)
+    
+    from functools import partial
+    from inference import batched_inference, distilbert_logits, load_distilbert
+    
+    model, tokenizer = load_distilbert(teacher_path)
+    texts = [str(text) for text in texts]
+    logits = batched_inference(texts, partial(distilbert_logits, model, tokenizer), batch_size).numpy()
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(path, logits.astype(np.float32))
+    return logits
+
+class DistillationLoss:
+    """alpha * T^2 * KL(teacher || student) on temperature-scaled logits + (1 - alpha) * cross-entropy."""
+    
+    def __init__(self, temperature=2.0, alpha=0.5):
+        self.temperature = temperature
+        self.alpha = alpha
+        self.cross_entropy = nn.CrossEntropyLoss()
+    
+    def __call__(self, student_logits, labels, teacher_logits):
+        soft_loss = F.kl_div(
+            F.log_softmax(student_logits / self.temperature, dim=1),
+            F.log_softmax(teacher_logits / self.temperature, dim=1),
+            reduction='batchmean', log_target=True
+        ) * self.temperature ** 2
+        return self.alpha * soft_loss + (1 - self.alpha) * self.cross_entropy(student_logits, labels)
+
+def evaluate_rnn(model, loader, num_classes=3):
+    # Correct counts and the confusion matrix stay as tensors on the model's device until the end.
+    # Under torch.distributed each rank scores its own shard and the matrices are summed.
+    device = next(model.parameters()).device
+    confusion = torch.zeros(num_classes * num_classes, dtype=torch.long, device=device)
+    model.eval()
+    with torch.no_grad():
+        for sequences, labels, *_ in loader:
+            predicted = model(sequences.to(device)).argmax(dim=1)
+            confusion += torch.bincount(labels.to(device) * num_classes + predicted, minlength=num_classes * num_classes)
+    if dist.is_initialized():
+        dist.all_reduce(confusion)
+    confusion = confusion.view(num_classes, num_classes).cpu()
+    accuracy = confusion.trace().item() / max(confusion.sum().item(), 1)
+    return accuracy, confusion
+
+def snapshot_state(model, checkpoint_path=None):
+    # state_dict() returns live references to the parameters, so the snapshot must copy them.
+    state = {name: tensor.detach().to('cpu', copy=True) for name, tensor in model.state_dict().items()}
+    if checkpoint_path:
+        torch.save(state, checkpoint_path)
+        return None
+    return state
+
+def train_rnn_model(model, train_loader, val_loader, epochs=50, criterion=None, eval_interval=1, patience=None,
+                    min_delta=0.0, checkpoint_path=None, lr=0.1, on_evaluate=None):
+    # on_evaluate(epoch, val_accuracy) is called after every evaluation; a truthy return stops training.
+    criterion = criterion or nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    # A DistributedDataParallel wrapper trains; the bare module is evaluated, snapshotted and returned.
+    module = model.module if isinstance(model, DistributedDataParallel) else model
+    num_classes = module.fc.out_features
+    main_process = is_main_process()
     
     best_val_acc = 0.0
+    best_model_state = None
+    has_best = False
+    evals_without_improvement = 0
+    val_accuracy, confusion, val_epoch = 0.0, None, None
     model.train()
     
     for epoch in range(epochs):
         total_loss = 0
+        num_batches = 0
+        data_seconds = 0.0
+        compute_seconds = 0.0
+        epoch_start = time.perf_counter()
+        set_loader_epoch(train_loader, epoch)
         model.train()
         
-        for sequences, labels in train_loader:
-            optimizer.zero_grad()
-            outputs = model(sequences)
-            loss = criterion(outputs, labels)
-            loss.backward()
-            optimizer.step()
-            total_loss += loss.item()
-        
-        model.eval()
-        val_predictions = []
-        val_true = []
+        # join() lets ranks that run out of batches early keep answering the others' gradient all-reduces.
+        with model.join() if module is not model else nullcontext():
+            batch_start = time.perf_counter()
+            for sequences, labels, *targets in train_loader:
+                fetched = time.perf_counter()
+                data_seconds += fetched - batch_start
+                instrumentation.record('train/data', fetched - batch_start, batch_start)
+                instrumentation.count('train/examples', len(labels))
+                
+                optimizer.zero_grad()
+                with instrumentation.stage('train/forward'):
+                    logits = model(sequences)
+                    loss = criterion(logits, labels, *targets)
+                with instrumentation.stage('train/backward'):
+                    loss.backward()
+                with instrumentation.stage('train/optimizer'):
+                    optimizer.step()
+                total_loss += loss.item()
+                num_batches += 1
+                
+                batch_start = time.perf_counter()
+                compute_seconds += batch_start - fetched
         
-        with torch.no_grad():
-            for sequences, labels in val_loader:
-                outputs = model(sequences)
-                predicted = torch.argmax(outputs, dim=1)
-                val_predictions.extend(predicted.cpu().numpy())
-                val_true.extend(labels.cpu().numpy())
-        
-        val_accuracy = accuracy_score(val_true, val_predictions)
+        evaluated = (epoch + 1) % eval_interval == 0 or epoch + 1 == epochs
+        if evaluated:
+            with instrumentation.stage('train/validation'):
+                val_accuracy, confusion = evaluate_rnn(module, val_loader, num_classes)
+            val_epoch = epoch + 1
+            if not has_best or val_accuracy > best_val_acc + min_delta:
+                best_val_acc = val_accuracy
+                if main_process:
+                    best_model_state = snapshot_state(module, checkpoint_path)
+                has_best = True
+                evals_without_improvement = 0
+            else:
+                evals_without_improvement += 1
 
-        if (epoch + 1) % 10 == 0:
-            print(f'Epoch {epoch+1}/{epochs}, Loss: {total_loss/len(train_loader):.4f}, Val Acc: {val_accuracy:.4f}')
-            cm = confusion_matrix(val_true, val_predictions)
-            print("Confusion Matrix:")
-            print(cm)
+        if main_process and (epoch + 1) % 10 == 0:
+            # With an eval_interval that does not divide 10 the latest accuracy is older than this epoch; say so.
+            if val_epoch is None:
+                validation = 'Val Acc: not evaluated yet'
+            elif evaluated:
+                validation = f'Val Acc: {val_accuracy:.4f}'
+            else:
+                validation = f'Val Acc: {val_accuracy:.4f} (epoch {val_epoch})'
+            print(f'Epoch {epoch+1}/{epochs}, Loss: {total_loss/max(num_batches, 1):.4f}, {validation}, '
+                  f'Time: {time.perf_counter() - epoch_start:.2f}s '
+                  f'(data wait {data_seconds:.2f}s, train compute {compute_seconds:.2f}s)')
+            if evaluated:
+                print("Confusion Matrix:")
+                print(confusion.numpy())
         
-        if val_accuracy > best_val_acc:
-            best_val_acc = val_accuracy
-            best_model_state = model.state_dict().copy()
+        if evaluated and patience is not None and evals_without_improvement >= patience:
+            if main_process:
+                print(f'Early stopping at epoch {epoch+1}: no improvement over {best_val_acc:.4f} '
+                      f'in {patience} evaluations')
+            break
+        if evaluated and on_evaluate is not None and on_evaluate(epoch + 1, val_accuracy):
+            break
     
-    model.load_state_dict(best_model_state)
-    return model, best_val_acc
+    if main_process and checkpoint_path and has_best:
+        best_model_state = torch.load(checkpoint_path)
+    if best_model_state is not None:
+        module.load_state_dict(best_model_state)
+    return module, best_val_acc
 
 def save_rnn_model(model, vocab, word_to_idx, save_dir='./rnn-model'):
-    os.makedirs(save_dir, exist_ok=True)
-    
-    torch.save(model.state_dict(), f'{save_dir}/model.pth')
-    
-    with open(f'{save_dir}/vocab.pkl', 'wb') as f:
-        pickle.dump({'vocab': vocab, 'word_to_idx': word_to_idx}, f)
-    
-    config = {
-        'vocab_size': len(vocab),
-        'embedding_dim': 100,
-        'lstm1_units': 64,
-        'lstm2_units': 32,
-        'dropout_rate': 0.3,
-        'num_classes': 3
-    }
-    
-    with open(f'{save_dir}/config.pkl', 'wb') as f:
-        pickle.dump(config, f)
+    if model.config['vocab_size'] != len(vocab):
+        raise ValueError(f"model embeds {model.config['vocab_size']} tokens but the vocabulary has {len(vocab)}")
+    save_rnn_artifact(save_dir, dict(model.config), vocab, model.state_dict())
 
-def main():
-    print("Training RNN Model for Congressional Rhetoric Classification")
-    
+def in_memory_loaders(batch_size=32, teacher_path=None, loader_options=None, num_replicas=1, rank=0):
+    loader_options = loader_options or {}
     df = create_congressional_rhetoric_dataset()
     X_train, X_test, y_train, y_test = train_test_split(
         df['text'].values, df['label'].values,
         test_size=0.2, random_state=42, stratify=df['label'].values
     )
     
-    print(f"Training samples: {len(X_train)}")
-    print(f"Test samples: {len(X_test)}")
-    
     vocab, word_to_idx = build_vocabulary(X_train, max_vocab=10000)
-    print(f"Vocabulary size: {len(vocab)}")
+    if rank == 0:
+        print(f"Training samples: {len(X_train)}")
+        print(f"Test samples: {len(X_test)}")
+        print(f"Vocabulary size: {len(vocab)}")
     
     X_train_seq = texts_to_sequences(X_train, word_to_idx)
     X_test_seq = texts_to_sequences(X_test, word_to_idx)
     
-    train_dataset = CongressionalRNNDataset(X_train_seq, y_train)
+    teacher_logits = compute_teacher_logits(X_train, teacher_path) if teacher_path else None
+    train_dataset = CongressionalRNNDataset(X_train_seq, y_train, teacher_logits)
     test_dataset = CongressionalRNNDataset(X_test_seq, y_test)
     
-    train_loader = DataLoader(train_dataset, batch_size=32, shuffle=True)
-    test_loader = DataLoader(test_dataset, batch_size=32, shuffle=False)
+    train_loader = DataLoader(
+        train_dataset,
+        batch_sampler=BucketBatchSampler(train_dataset.lengths, batch_size, num_replicas=num_replicas, rank=rank),
+        collate_fn=pad_collate, **loader_kwargs(**loader_options)
+    )
+    test_loader = DataLoader(
+        test_dataset,
+        batch_sampler=BucketBatchSampler(test_dataset.lengths, batch_size, shuffle=False, num_replicas=num_replicas,
+                                         rank=rank),
+        collate_fn=pad_collate, **loader_kwargs(**loader_options)
+    )
+    return vocab, word_to_idx, train_loader, test_loader
+
+def token_store_loaders(path, batch_size=32, loader_options=None, num_replicas=1, rank=0):
+    loader_options = loader_options or {}
+    # The store holds the whole corpus; splitting indices the same way as in_memory_loaders splits texts
+    # gives the same train/validation partition without reading a single token.
+    store = TokenStore(path)
+    vocab = store.vocabulary()
+    labels = np.asarray(store.labels)
+    train_index, test_index = train_test_split(
+        np.arange(len(store)), test_size=0.2, random_state=42, stratify=labels
+    )
+    if rank == 0:
+        print(f"Training samples: {len(train_index)}")
+        print(f"Test samples: {len(test_index)}")
+        print(f"Vocabulary size: {len(vocab)}")
     
-    model = CongressionalRNN(vocab_size=len(vocab))
+    train_dataset = TokenStoreRNNDataset(store, train_index)
+    test_dataset = TokenStoreRNNDataset(store, test_index)
+    train_loader = DataLoader(
+        train_dataset,
+        batch_sampler=BucketBatchSampler(train_dataset.lengths, batch_size, num_replicas=num_replicas, rank=rank),
+        collate_fn=token_store_collate, **loader_kwargs(**loader_options)
+    )
+    test_loader = DataLoader(
+        test_dataset,
+        batch_sampler=BucketBatchSampler(test_dataset.lengths, batch_size, shuffle=False, num_replicas=num_replicas,
+                                         rank=rank),
+        collate_fn=token_store_collate, **loader_kwargs(**loader_options)
+    )
+    return vocab, {word: idx for idx, word in enumerate(vocab)}, train_loader, test_loader
+
+def streaming_loaders(train_shards, val_shards, batch_size=32, shuffle_buffer_size=10000, vocab_workers=1,
+                      loader_options=None, num_replicas=1, rank=0):
+    loader_options = loader_options or {}
+    # Vocabulary comes from one streaming pass over the training shards; nothing else is held in memory.
+    vocab, word_to_idx = build_vocabulary(iter_texts(train_shards), max_vocab=10000, num_workers=vocab_workers)
+    if rank == 0:
+        print(f"Vocabulary size: {len(vocab)}")
+    
+    collate = TextBatchCollator(word_to_idx)
+    train_loader = DataLoader(
+        ShardedTextDataset(train_shards, shuffle_buffer_size=shuffle_buffer_size, num_replicas=num_replicas, rank=rank),
+        batch_size=batch_size, collate_fn=collate, **loader_kwargs(**loader_options)
+    )
+    test_loader = DataLoader(
+        ShardedTextDataset(val_shards, num_replicas=num_replicas, rank=rank), batch_size=batch_size, collate_fn=collate,
+        **loader_kwargs(**loader_options)
+    )
+    return vocab, word_to_idx, train_loader, test_loader
+
+def distillation_report(student, word_to_idx, teacher_path, batch_size=32):
+    from functools import partial
+    from inference import batched_inference, distilbert_logits, load_distilbert, rnn_logits
+    from test_models import evaluation_split
+    
+    texts, labels = evaluation_split()
+    teacher, tokenizer = load_distilbert(teacher_path)
+    student.eval()
+    models = {
+        'Teacher (DistilBERT)': partial(distilbert_logits, teacher, tokenizer),
+        'Student (RNN)': partial(rnn_logits, student, word_to_idx)
+    }
+    
+    print("Model                 Accuracy  Latency (batch 1)  Throughput (batched)")
+    for name, batch_fn in models.items():
+        start = time.perf_counter()
+        for text in texts:
+            batch_fn([text])
+        single_ms = 1000 * (time.perf_counter() - start) / len(texts)
+        
+        start = time.perf_counter()
+        logits = batched_inference(texts, batch_fn, batch_size)
+        throughput = len(texts) / (time.perf_counter() - start)
+        
+        accuracy = float((logits.argmax(dim=1).numpy() == labels).mean())
+        print(f"{name:<21} {accuracy:8.4f}  {single_ms:13.2f} ms  {throughput:14.1f} texts/s")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Train the Congressional rhetoric RNN',
+        epilog='Multi-process CPU training: torchrun --standalone --nproc_per_node=N train_rnn.py [options]'
+    )
+    parser.add_argument('--train-shards', nargs='+', help='JSONL/CSV/Parquet files, directories or globs to stream training data from')
+    parser.add_argument('--val-shards', nargs='+', help='shards to validate on (required with --train-shards)')
+    parser.add_argument('--token-store', help='train on a store written by `token_store.py rnn` (the full corpus; '
+                                              'it is split 80/20 like the in-memory dataset)')
+    parser.add_argument('--shuffle-buffer', type=int, default=10000)
+    parser.add_argument('--vocab-workers', type=int, default=1, help='processes used to count the vocabulary')
+    parser.add_argument('--batch-size', type=int, default=32, help='examples per batch on each process')
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--lr', type=float, default=0.1)
+    parser.add_argument('--eval-interval', type=int, default=1, help='validate every N epochs')
+    parser.add_argument('--patience', type=int, default=None, help='stop after N evaluations without improvement')
+    parser.add_argument('--min-delta', type=float, default=0.0, help='smallest accuracy gain that counts as improvement')
+    parser.add_argument('--checkpoint-path', default=None, help='stream the best weights to this file instead of RAM')
+    parser.add_argument('--distill-from', metavar='TEACHER_PATH',
+                        help='train on soft targets from this fine-tuned DistilBERT (e.g. ./destilbert-model)')
+    parser.add_argument('--temperature', type=float, default=2.0)
+    parser.add_argument('--alpha', type=float, default=0.5, help='weight of the soft-target loss')
+    parser.add_argument('--num-workers', type=int, default=0, help='DataLoader worker processes')
+    parser.add_argument('--prefetch-factor', type=int, default=2, help='batches prefetched per worker')
+    parser.add_argument('--no-persistent-workers', action='store_true', help='restart workers every epoch')
+    parser.add_argument('--pin-memory', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--threads-per-rank', type=int, default=None,
+                        help='intra-op threads per process under torchrun (default: cores / processes)')
+    parser.add_argument('--output', default='./rnn-model')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure(args)
+    # Checked before any rank reaches a barrier, so a bad combination cannot leave the other ranks waiting.
+    if args.token_store and (args.train_shards or args.distill_from):
+        parser.error('--token-store cannot be combined with --train-shards or --distill-from')
+    if args.train_shards and args.distill_from:
+        parser.error('--distill-from is only supported for the in-memory dataset')
+    if args.train_shards and not args.val_shards:
+        parser.error('--val-shards is required when streaming from --train-shards')
+    
+    world_size, rank = init_distributed()
+    if world_size > 1:
+        # torchrun defaults every rank to one OpenMP thread; split the cores between ranks instead.
+        torch.set_num_threads(args.threads_per_rank or max(1, (os.cpu_count() or 1) // world_size))
+    
+    loader_options = {
+        'num_workers': args.num_workers,
+        'prefetch_factor': args.prefetch_factor,
+        'persistent_workers': not args.no_persistent_workers,
+        'pin_memory': args.pin_memory,
+        'seed': args.seed
+    }
+    
+    if rank == 0:
+        print("Training RNN Model for Congressional Rhetoric Classification")
+    
+    if world_size > 1:
+        print(f"Rank {rank}/{world_size}: {torch.get_num_threads()} threads")
+        # Rank 0 builds the loaders first so the teacher-logit cache is written once, then the others read it.
+        if rank != 0:
+            dist.barrier()
+    
+    if args.token_store:
+        vocab, word_to_idx, train_loader, test_loader = token_store_loaders(
+            args.token_store, args.batch_size, loader_options, world_size, rank
+        )
+    elif args.train_shards:
+        vocab, word_to_idx, train_loader, test_loader = streaming_loaders(
+            args.train_shards, args.val_shards, args.batch_size, args.shuffle_buffer, args.vocab_workers, loader_options,
+            world_size, rank
+        )
+    else:
+        vocab, word_to_idx, train_loader, test_loader = in_memory_loaders(
+            args.batch_size, args.distill_from, loader_options, world_size, rank
+        )
+    if world_size > 1 and rank == 0:
+        dist.barrier()
+    
+    model = CongressionalRNN(vocab_size=len(vocab), pack_sequences=True)
     total_params = sum(p.numel() for p in model.parameters())
-    print(f"Model parameters: {total_params:,}")
+    if rank == 0:
+        print(f"Model parameters: {total_params:,}")
+    if world_size > 1:
+        # DDP broadcasts rank 0's initial weights, so every replica starts identical.
+        model = DistributedDataParallel(model)
     
-    trained_model, best_accuracy = train_rnn_model(model, train_loader, test_loader, epochs=50)
+    criterion = DistillationLoss(args.temperature, args.alpha) if args.distill_from else None
+    with instrumentation.profile(args.profile, args.profile_output):
+        trained_model, best_accuracy = train_rnn_model(
+            model, train_loader, test_loader, epochs=args.epochs, criterion=criterion, eval_interval=args.eval_interval,
+            patience=args.patience, min_delta=args.min_delta, checkpoint_path=args.checkpoint_path, lr=args.lr
+        )
     
-    print(f"Best validation accuracy: {best_accuracy:.4f}")
+    if is_main_process():
+        print(f"Best validation accuracy: {best_accuracy:.4f}")
+        
+        save_rnn_model(trained_model, vocab, word_to_idx, args.output)
+        print(f"RNN model saved to '{args.output}'")
+        
+        if args.distill_from:
+            distillation_report(trained_model, word_to_idx, args.distill_from, args.batch_size)
+        instrumentation.report(args)
     
-    save_rnn_model(trained_model, vocab, word_to_idx, './rnn-model')
-    print("RNN model saved to './rnn-model'")
+    if dist.is_initialized():
+        dist.destroy_process_group()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file